@@ -0,0 +1,234 @@
+"""Inference servers: the client for the configured API, and several servers behind one client.
+
+STAGIARIA_BACKEND picks the API: "ollama" (default) or "openai" for any
+OpenAI-compatible server, at OPENAI_BASE_URL. Several servers are listed in
+STAGIARIA_HOSTS (comma-separated, e.g. "127.0.0.1:11434,192.168.0.20:11434")
+and each request goes to the least busy healthy one; with a single server
+the plain client is used.
+"""
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ollama_client import OllamaClient, OllamaError, OllamaConnectionError
+from openai_client import OpenAIClient
+
+BACKEND_KINDS = ("ollama", "openai")
+
+# Seconds before a server that failed is probed again
+RETRY_SECONDS = 30
+
+
+def backend_kind():
+    """Server API from STAGIARIA_BACKEND: 'ollama' (default) or 'openai'"""
+    kind = (os.environ.get("STAGIARIA_BACKEND") or "ollama").strip().lower()
+    return kind if kind in BACKEND_KINDS else "ollama"
+
+
+def configured_hosts(hosts=None, kind=None):
+    """Server addresses from hosts (a list or comma-separated string), STAGIARIA_HOSTS, else
+    OLLAMA_HOST (OPENAI_BASE_URL for the openai backend).
+
+    [None] means the default local server.
+    """
+    default = "OPENAI_BASE_URL" if (kind or backend_kind()) == "openai" else "OLLAMA_HOST"
+    hosts = hosts or os.environ.get("STAGIARIA_HOSTS") or os.environ.get(default) or ""
+    if isinstance(hosts, str):
+        hosts = hosts.split(",")
+    hosts = [host.strip() for host in hosts if host and host.strip()]
+    return hosts or [None]
+
+
+def _client(kind, host, pool_size):
+    if kind == "openai":
+        return OpenAIClient(host, pool_size=pool_size)
+    return OllamaClient(host, pool_size=pool_size)
+
+
+def open_client(hosts=None, pool_size=4, kind=None):
+    """A client for one server, a BackendPool for several; pool_size connections per server"""
+    kind = kind or backend_kind()
+    hosts = configured_hosts(hosts, kind)
+    if len(hosts) == 1:
+        return _client(kind, hosts[0], pool_size)
+    return BackendPool([_client(kind, host, pool_size) for host in hosts])
+
+
+class Backend:
+    """One server of a BackendPool and its bookkeeping"""
+
+    def __init__(self, client):
+        self.client = client
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.healthy = True
+        self.retry_at = 0.0
+
+    @property
+    def name(self):
+        return self.client.base_url
+
+
+class BackendPool:
+    """Spreads requests over several servers with the OllamaClient interface.
+
+    Each request goes to the healthy server with the fewest requests in
+    flight. A server that cannot be reached is taken out of rotation and
+    the request is retried on the next one (streams only until their first
+    chunk: text already written cannot be replayed). Failed servers are
+    pinged again every retry_seconds and rejoin once they answer.
+    """
+
+    def __init__(self, clients, retry_seconds=RETRY_SECONDS):
+        self.backends = [Backend(client) for client in clients]
+        self.retry_seconds = retry_seconds
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return ", ".join(backend.name for backend in self.backends)
+
+    @property
+    def not_running_message(self):
+        return self.backends[0].client.not_running_message
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        for backend in self.backends:
+            backend.client.close()
+
+    def stats(self):
+        """Requests, failures and health of each server"""
+        with self._lock:
+            return [{"host": backend.name, "requests": backend.requests, "failures": backend.failures,
+                     "healthy": backend.healthy} for backend in self.backends]
+
+    def check_health(self):
+        """Ping the servers out of rotation whose retry time has come; those answering rejoin"""
+        now = time.time()
+        with self._lock:
+            due = [backend for backend in self.backends if not backend.healthy and now >= backend.retry_at]
+            # Concurrent callers do not ping the same server again
+            for backend in due:
+                backend.retry_at = now + self.retry_seconds
+        for backend in due:
+            if backend.client.ping():
+                with self._lock:
+                    backend.healthy = True
+
+    def _acquire(self, tried):
+        self.check_health()
+        with self._lock:
+            candidates = [backend for backend in self.backends if backend.healthy and backend not in tried]
+            if not candidates:
+                raise OllamaConnectionError(self.not_running_message)
+            backend = min(candidates, key=lambda b: (b.outstanding, b.requests))
+            backend.outstanding += 1
+            backend.requests += 1
+            return backend
+
+    def _release(self, backend):
+        with self._lock:
+            backend.outstanding -= 1
+
+    def _failed(self, backend):
+        with self._lock:
+            backend.failures += 1
+            backend.healthy = False
+            backend.retry_at = time.time() + self.retry_seconds
+
+    def _call(self, method, *args, **kwargs):
+        tried = []
+        while True:
+            backend = self._acquire(tried)
+            try:
+                return getattr(backend.client, method)(*args, **kwargs)
+            except OllamaConnectionError:
+                self._failed(backend)
+                tried.append(backend)
+            finally:
+                self._release(backend)
+
+    def _stream(self, method, *args, **kwargs):
+        tried = []
+        while True:
+            backend = self._acquire(tried)
+            received = False
+            stream = getattr(backend.client, method)(*args, **kwargs)
+            try:
+                for chunk in stream:
+                    received = True
+                    yield chunk
+                return
+            except OllamaConnectionError:
+                self._failed(backend)
+                if received:
+                    raise
+                tried.append(backend)
+            finally:
+                stream.close()
+                self._release(backend)
+
+    def _broadcast(self, method, *args):
+        """Call method on every healthy server at once; raises only if none succeeded"""
+        self.check_health()
+        with self._lock:
+            backends = [backend for backend in self.backends if backend.healthy]
+
+        def call(backend):
+            try:
+                return getattr(backend.client, method)(*args), None
+            except OllamaError as e:
+                if isinstance(e, OllamaConnectionError):
+                    self._failed(backend)
+                return None, e
+
+        if not backends:
+            raise OllamaConnectionError(self.not_running_message)
+        with ThreadPoolExecutor(max_workers=len(backends)) as pool:
+            outcomes = list(pool.map(call, backends))
+        if all(error is not None for _, error in outcomes):
+            raise outcomes[0][1]
+        return [result for result, error in outcomes if error is None]
+
+    def generate(self, *args, **kwargs):
+        return self._call("generate", *args, **kwargs)
+
+    def generate_stream(self, *args, **kwargs):
+        return self._stream("generate_stream", *args, **kwargs)
+
+    def chat(self, *args, **kwargs):
+        return self._call("chat", *args, **kwargs)
+
+    def chat_stream(self, *args, **kwargs):
+        return self._stream("chat_stream", *args, **kwargs)
+
+    def show(self, model):
+        return self._call("show", model)
+
+    def ping(self, timeout=5):
+        return any(backend.client.ping(timeout) for backend in self.backends)
+
+    def load(self, model, keep_alive=None):
+        """Load the model on every server"""
+        return self._broadcast("load", model, keep_alive)
+
+    def unload(self, model):
+        return self._broadcast("unload", model)
+
+    def running_models(self):
+        return [entry for models in self._broadcast("running_models") for entry in models]
+
+    def is_loaded(self, model):
+        """Whether the model is resident on every healthy server (None when one of them cannot tell)"""
+        loaded = self._broadcast("is_loaded", model)
+        if any(state is None for state in loaded):
+            return None
+        return all(loaded)
@@ -0,0 +1,156 @@
+"""Persistent on-disk caches shared across runs."""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import tempfile
+import threading
+
+
+def default_cache_dir():
+    """Cache root: STAGIARIA_CACHE_DIR, else the user cache directory"""
+    cache_dir = os.environ.get("STAGIARIA_CACHE_DIR")
+    if cache_dir:
+        return cache_dir
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "stagiaria")
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Hex SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def atomic_write_text(path, text):
+    """Write text to path so readers never see a partial file"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class ExtractionCache:
+    """Extracted text keyed by input content hash and extractor version.
+
+    Entries live in <cache_dir>/extraction/v<version>/<aa>/<sha256>.txt, so
+    bumping the extractor version simply starts a fresh namespace.
+    """
+
+    def __init__(self, extractor_version, cache_dir=None):
+        self.extractor_version = str(extractor_version)
+        self.root = os.path.join(cache_dir or default_cache_dir(), "extraction", "v" + self.extractor_version)
+
+    def _path(self, file_hash):
+        return os.path.join(self.root, file_hash[:2], file_hash + ".txt")
+
+    def get(self, file_hash):
+        """Cached text for a content hash, or None"""
+        try:
+            with open(self._path(file_hash), 'r', encoding='utf-8') as f:
+                return f.read()
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def put(self, file_hash, text):
+        """Store extracted text; cache write failures are not fatal"""
+        try:
+            atomic_write_text(self._path(file_hash), text)
+        except OSError:
+            pass
+
+
+def default_response_cache_bytes():
+    """Response cache size limit from STAGIARIA_RESPONSE_CACHE_MB (default 200 MB)"""
+    try:
+        megabytes = float(os.environ.get("STAGIARIA_RESPONSE_CACHE_MB", 200))
+    except ValueError:
+        megabytes = 200
+    return int(megabytes * 1024 * 1024)
+
+
+def text_sha256(text):
+    """Hex SHA-256 of a string's UTF-8 encoding"""
+    return hashlib.sha256(text.encode('utf-8', errors='surrogatepass')).hexdigest()
+
+
+class ResponseCache:
+    """LLM responses in SQLite keyed by (model, prompt, document hash, options), with LRU eviction.
+
+    With read=False lookups always miss but new responses are still stored,
+    which regenerates every answer and refreshes the cache.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None, read=True):
+        cache_dir = cache_dir or default_cache_dir()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "responses.sqlite")
+        self.max_bytes = max_bytes if max_bytes is not None else default_response_cache_bytes()
+        self.read = read
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, response TEXT NOT NULL,"
+                " size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used)")
+
+    @staticmethod
+    def key(model, prompt_text, document_hash, options=None):
+        """Stable cache key for one request"""
+        payload = json.dumps([model, prompt_text, document_hash, options or {}],
+                             sort_keys=True, ensure_ascii=False)
+        return text_sha256(payload)
+
+    def get(self, key):
+        """Cached response text, or None (always None when reading is bypassed)"""
+        if not self.read:
+            return None
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+        return row[0]
+
+    def put(self, key, response):
+        """Store a response and evict least recently used entries beyond max_bytes"""
+        size = len(response.encode('utf-8', errors='surrogatepass'))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, response, size, time.time())
+            )
+            self._evict()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall()
+        doomed = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
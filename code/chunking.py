@@ -0,0 +1,101 @@
+"""Token-budgeted splitting of long documents on page and section boundaries."""
+import re
+
+PAGE_BREAK = "\f"
+
+# Conservative characters-per-token ratio for mixed English/Portuguese text
+CHARS_PER_TOKEN = 3.5
+
+# Context length Ollama uses when the Modelfile does not set num_ctx
+DEFAULT_CONTEXT_LENGTH = 4096
+
+# Tokens kept free for the chat template and separators
+TEMPLATE_OVERHEAD = 64
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+def estimate_tokens(text):
+    """Rough token count of text (no tokenizer needed)"""
+    return int(len(text) / CHARS_PER_TOKEN) + 1
+
+
+def parse_num_ctx(parameters):
+    """num_ctx from the 'parameters' text returned by /api/show, or None"""
+    for line in (parameters or "").splitlines():
+        fields = line.split()
+        if len(fields) == 2 and fields[0] == "num_ctx":
+            try:
+                return int(fields[1])
+            except ValueError:
+                return None
+    return None
+
+
+def chunk_budget(context_length, prompt_text, output_reserve=None):
+    """Tokens of document text that fit in one request next to the prompt and the answer"""
+    if output_reserve is None:
+        output_reserve = min(2048, context_length // 4)
+    budget = context_length - estimate_tokens(prompt_text) - output_reserve - TEMPLATE_OVERHEAD
+    return max(256, budget)
+
+
+def _hard_split(text, max_chars):
+    return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+
+
+def _segments(text, max_tokens):
+    """Break text into pieces no larger than max_tokens, preferring pages, then sections/paragraphs, then lines"""
+    max_chars = int(max_tokens * CHARS_PER_TOKEN)
+    for page in text.split(PAGE_BREAK):
+        if estimate_tokens(page) <= max_tokens:
+            yield page
+            continue
+        for paragraph in _PARAGRAPH_BREAK.split(page):
+            if estimate_tokens(paragraph) <= max_tokens:
+                yield paragraph
+                continue
+            for line in paragraph.split("\n"):
+                if estimate_tokens(line) <= max_tokens:
+                    yield line
+                else:
+                    yield from _hard_split(line, max_chars)
+
+
+def split_text(text, max_tokens):
+    """Split text into chunks of at most max_tokens (estimated), packing whole pages/paragraphs greedily"""
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+
+    chunks = []
+    current = []
+    current_tokens = 0
+    for segment in _segments(text, max_tokens):
+        if not segment.strip():
+            continue
+        tokens = estimate_tokens(segment)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        current.append(segment)
+        current_tokens += tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def group_to_budget(texts, max_tokens):
+    """Group consecutive texts so each group's combined size fits max_tokens"""
+    groups = []
+    current = []
+    current_tokens = 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if current and current_tokens + tokens > max_tokens:
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
@@ -0,0 +1,179 @@
+"""Adaptive number of LLM requests in flight (probing for throughput, multiplicative decrease on overload)."""
+import os
+import time
+import threading
+
+# A window lasts at least this many times the average request duration, so its rate is not just noise
+WINDOW_ROUNDS = 8
+# A slot more is kept if the rate beats the current one by this fraction; a slot less if it loses less
+PROBE_MARGIN = 0.05
+# Windows to wait after a probe that did not pay off, before trying again
+HOLD_WINDOWS = 5
+# Overload (server error, timeout, latency spike) divides the limit by two
+DECREASE_FACTOR = 0.5
+# Latency this many times the usual one, and at least this many seconds above it, counts as a spike
+SPIKE_FACTOR = 4.0
+SPIKE_MIN_SECONDS = 1.0
+# Weight of the newest request in the usual latency (exponential moving average)
+BASELINE_WEIGHT = 0.2
+
+
+def default_max_concurrency(initial):
+    """Upper bound of the adaptive limit, from STAGIARIA_MAX_CONCURRENCY (default twice initial)"""
+    try:
+        value = int(os.environ.get("STAGIARIA_MAX_CONCURRENCY", 0))
+    except ValueError:
+        value = 0
+    return value if value > 0 else initial * 2
+
+
+class AdaptiveLimiter:
+    """A semaphore whose size follows the server's throughput.
+
+    The limit starts at initial. Windows of at least WINDOW_ROUNDS request
+    durations measure the tokens generated per second. A window at the
+    current limit gives the reference rate, and the next one probes a slot
+    more (or less): a slot more is kept if it raised the rate by
+    PROBE_MARGIN, a slot less if it cost less than that, so the limit
+    settles where the server stops gaining. After a probe that did not pay
+    off, probing pauses for a few windows and then tries the other way.
+    Server errors, timeouts and latency spikes halve the limit at once, but
+    only once for the requests sent under the same limit: a burst of
+    failures is one overload, not one per request.
+    The limit stays between minimum and maximum (equal values: a fixed
+    limit). clock is the time source (tests pass a simulated one).
+    """
+
+    def __init__(self, initial, minimum=1, maximum=None, clock=time.time):
+        self.limit = max(1, initial)
+        self.minimum = max(1, min(minimum, self.limit))
+        self.maximum = max(self.limit, maximum or self.limit)
+        self.in_flight = 0
+        self.peak = self.limit
+        self.increases = 0
+        self.decreases = 0
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._baseline = None
+        self._last_decrease = 0.0
+        # Rate at the current limit, the slot being probed (+1, -1, or 0 for none) and the next way to probe
+        self._rate = None
+        self._probe = 0
+        self._direction = 1
+        self._hold = 0
+        self._reset_window()
+
+    def _reset_window(self):
+        self._window_started = self._clock()
+        self._window_tokens = 0
+        self._window_requests = 0
+        self._window_seconds = 0.0
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def succeeded(self, tokens, latency=None, started=None):
+        """A request started at time started finished with tokens generated.
+
+        latency is its wait for the first token, normalized by prompt size.
+        """
+        with self._cond:
+            if latency is not None:
+                baseline = self._baseline
+                spike = baseline is not None and latency > max(SPIKE_FACTOR * baseline, baseline + SPIKE_MIN_SECONDS)
+                if spike and not self._sent_before_decrease(started):
+                    self._decrease()
+                    return
+                if self._baseline is None:
+                    self._baseline = latency
+                else:
+                    self._baseline += BASELINE_WEIGHT * (latency - self._baseline)
+
+            # Requests sent before a decrease ran under another limit
+            if self._sent_before_decrease(started):
+                return
+            now = self._clock()
+            self._window_tokens += tokens
+            self._window_requests += 1
+            if started is not None:
+                self._window_seconds += now - started
+            elapsed = now - self._window_started
+            average = self._window_seconds / self._window_requests
+            if self._window_requests < self.limit or elapsed < WINDOW_ROUNDS * average or elapsed <= 0:
+                return
+            self._end_window(self._window_tokens / elapsed)
+            self._reset_window()
+
+    def _end_window(self, rate):
+        """Judge the probe (or start one) from the rate of the window that just ended"""
+        if self._probe > 0:
+            kept = rate >= self._rate * (1 + PROBE_MARGIN)
+        elif self._probe < 0:
+            kept = rate >= self._rate * (1 - PROBE_MARGIN)
+        else:
+            kept = None
+        if kept is not None:
+            if kept:
+                # Same way again, from the new limit
+                self._rate = rate
+            else:
+                self._set_limit(self.limit - self._probe)
+                self._direction = -self._probe
+                self._hold = HOLD_WINDOWS
+                # Measured again at the restored limit before the next probe
+                self._rate = None
+            self._probe = 0
+            return
+        self._rate = rate
+        if self._hold:
+            self._hold -= 1
+            return
+        direction = self._direction
+        if not self.minimum <= self.limit + direction <= self.maximum:
+            direction = -direction
+        if self.minimum <= self.limit + direction <= self.maximum:
+            self._probe = direction
+            self._set_limit(self.limit + direction)
+
+    def _set_limit(self, limit):
+        if limit > self.limit:
+            self.increases += 1
+            self.peak = max(self.peak, limit)
+            self._cond.notify_all()
+        self.limit = limit
+
+    def failed(self, started=None):
+        """A request started at time started found the server overloaded (error, timeout): back off"""
+        with self._cond:
+            if not self._sent_before_decrease(started):
+                self._decrease()
+
+    def _sent_before_decrease(self, started):
+        """The request was sent before the last decrease, which already answered its overload"""
+        return started is not None and started < self._last_decrease
+
+    def _decrease(self):
+        self.limit = max(self.minimum, int(self.limit * DECREASE_FACTOR))
+        self.decreases += 1
+        self._last_decrease = self._clock()
+        # The latency that caused it may be the new usual one: measure it again
+        self._baseline = None
+        # Measure the new limit, then probe upwards again
+        self._rate = None
+        self._probe = 0
+        self._direction = 1
+        self._hold = 0
+        self._reset_window()
+
+    def to_dict(self):
+        with self._cond:
+            return {"limit": self.limit, "minimum": self.minimum, "maximum": self.maximum, "peak": self.peak,
+                    "increases": self.increases, "decreases": self.decreases}
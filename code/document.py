@@ -0,0 +1,141 @@
+"""Extracted documents, handed from extraction to the LLM stage in memory."""
+import os
+import shutil
+import tempfile
+import threading
+
+from fichas import SOURCE_SUFFIX
+from chunking import PAGE_BREAK
+
+DEFAULT_MEMORY_BUDGET_MB = 512
+
+
+def default_memory_budget():
+    """Bytes (UTF-8) of extracted text kept in memory, from STAGIARIA_MEMORY_BUDGET_MB (default 512)"""
+    try:
+        megabytes = float(os.environ.get("STAGIARIA_MEMORY_BUDGET_MB", DEFAULT_MEMORY_BUDGET_MB))
+    except ValueError:
+        megabytes = DEFAULT_MEMORY_BUDGET_MB
+    return int(megabytes * 1024 * 1024)
+
+
+def source_filename(original_filename):
+    """Name of the extracted text file for an input file: 'artigo.pdf' gives 'artigo.pdf_source.txt'"""
+    return original_filename + SOURCE_SUFFIX
+
+
+def page_offsets(text):
+    """Offset in text where each page starts (a single page when there are no page breaks)"""
+    offsets = [0]
+    index = text.find(PAGE_BREAK)
+    while index != -1 and index + 1 < len(text):
+        offsets.append(index + 1)
+        index = text.find(PAGE_BREAK, index + 1)
+    return offsets
+
+
+class SourceDocument:
+    """Extracted text of one input file, with its content hash, metadata and page offsets.
+
+    The text stays in memory unless a DocumentStore spills it to a file.
+    """
+
+    def __init__(self, file_path, text, file_hash=None, metadata=None):
+        self.file_path = file_path
+        self.file_hash = file_hash
+        self.metadata = metadata or {}
+        self.page_offsets = page_offsets(text)
+        self.pages = text.count(PAGE_BREAK)
+        self.length = len(text)
+        # UTF-8 size, counted against the store's memory budget
+        self.size = len(text.encode('utf-8'))
+        self.spill_path = None
+        self._text = text
+
+    @property
+    def name(self):
+        return os.path.basename(self.file_path)
+
+    @property
+    def in_memory(self):
+        return self._text is not None
+
+    @property
+    def text(self):
+        if self._text is not None:
+            return self._text
+        if self.spill_path is None:
+            raise Exception(f"Text of {self.name} was already released")
+        with open(self.spill_path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def write_source(self, directory):
+        """Write the text to directory as <name>_source.txt and return its path"""
+        path = os.path.join(directory, source_filename(self.name))
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.text)
+        return path
+
+    def spill(self, directory):
+        """Move the text out of memory into a file of directory, under a name no other document gets"""
+        fd, path = tempfile.mkstemp(suffix=SOURCE_SUFFIX, dir=directory)
+        with open(fd, 'w', encoding='utf-8') as f:
+            f.write(self._text)
+        self.spill_path = path
+        self._text = None
+
+    def release(self):
+        """Drop the text (memory or spill file) once the document is no longer needed"""
+        self._text = None
+        if self.spill_path is not None:
+            try:
+                os.remove(self.spill_path)
+            except OSError:
+                pass
+            self.spill_path = None
+
+
+class DocumentStore:
+    """Keeps the extracted text of a run within a memory budget.
+
+    Documents are held in memory up to memory_budget bytes (UTF-8); beyond it
+    they are spilled to a private local temporary directory (never the
+    output directory, which may be on a network share). With sources_dir,
+    every document is also written there as <name>_source.txt.
+    """
+
+    def __init__(self, memory_budget=None, sources_dir=None):
+        self.memory_budget = default_memory_budget() if memory_budget is None else memory_budget
+        self.sources_dir = sources_dir
+        self.in_memory = 0
+        self.spilled = 0
+        self._spill_dir = None
+        self._lock = threading.Lock()
+        if sources_dir:
+            os.makedirs(sources_dir, exist_ok=True)
+
+    def add(self, document):
+        if self.sources_dir:
+            document.write_source(self.sources_dir)
+        with self._lock:
+            if self.in_memory + document.size <= self.memory_budget:
+                self.in_memory += document.size
+                return
+            if self._spill_dir is None:
+                self._spill_dir = tempfile.mkdtemp(prefix="stagiaria-")
+            self.spilled += 1
+            spill_dir = self._spill_dir
+        document.spill(spill_dir)
+
+    def release(self, document):
+        """Forget a document whose ficha is done, making room for the next ones"""
+        with self._lock:
+            if document.in_memory:
+                self.in_memory -= document.size
+        document.release()
+
+    def close(self):
+        with self._lock:
+            spill_dir, self._spill_dir = self._spill_dir, None
+        if spill_dir is not None:
+            shutil.rmtree(spill_dir, ignore_errors=True)
@@ -0,0 +1,43 @@
+"""Settings from a .env file (KEY=VALUE lines), without the python-dotenv dependency."""
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_env(text):
+    """Dict of the KEY=VALUE lines of text; blank lines, # comments and 'export ' prefixes are allowed"""
+    values = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("export "):
+            line = line[len("export "):]
+        key, sep, value = line.partition("=")
+        key = key.strip()
+        if not sep or not key:
+            continue
+        value = value.strip()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+            value = value[1:-1]
+        elif " #" in value:
+            # Trailing comment after an unquoted value
+            value = value.split(" #", 1)[0].rstrip()
+        values[key] = value
+    return values
+
+
+def load_env_file(path=None):
+    """Copy the settings of .env (the current directory's, else the repository's) into os.environ.
+
+    Variables already set in the environment win. Returns the file read, or None.
+    """
+    candidates = [path] if path else [os.path.join(os.getcwd(), ".env"), os.path.join(ROOT, ".env")]
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            with open(candidate, 'r', encoding='utf-8', errors='replace') as f:
+                values = parse_env(f.read())
+            for key, value in values.items():
+                os.environ.setdefault(key, value)
+            return candidate
+    return None
@@ -0,0 +1,344 @@
+"""Text extraction from PDF, Word and plain-text inputs, run in a process pool."""
+import os
+import mmap
+import codecs
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from pdf_backends import available_backends, default_pdf_backend, iter_pages
+
+# PDF needs one of the backends of pdf_backends (PyPDF2 being the fallback)
+pdf_support = bool(available_backends())
+
+try:
+    from docx import Document
+    word_support = True
+except ImportError:
+    word_support = False
+
+from cache import ExtractionCache, file_sha256
+from chunking import PAGE_BREAK
+from document import SourceDocument
+
+# Bump whenever extracted text would change, so cached extractions are not reused
+EXTRACTOR_VERSION = 3
+
+PDF_EXTENSIONS = ('.pdf',)
+WORD_EXTENSIONS = ('.doc', '.docx')
+IMAGE_EXTENSIONS = ('.jpeg', '.jpg', '.png', '.tif', '.tiff')
+
+
+# Plain-text files larger than this are memory-mapped instead of read into memory
+MMAP_THRESHOLD = 8 * 1024 * 1024
+DECODE_CHUNK = 1024 * 1024
+
+# UTF-32 first: its little-endian BOM starts with the UTF-16 one
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# Stands in for the pages left out by a page limit
+OMITTED_PAGES = "[... {count} páginas omitidas ...]\n"
+
+
+def default_pdf_pages():
+    """Page limit from STAGIARIA_PDF_PAGES: read only the first and last N pages of PDFs (None reads all)"""
+    try:
+        pages = int(os.environ.get("STAGIARIA_PDF_PAGES", 0))
+    except ValueError:
+        pages = 0
+    return pages if pages > 0 else None
+
+
+def default_workers():
+    """Extraction worker count from STAGIARIA_EXTRACTION_WORKERS, else one per CPU core"""
+    try:
+        workers = int(os.environ.get("STAGIARIA_EXTRACTION_WORKERS", 0))
+    except ValueError:
+        workers = 0
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+def is_image(filename):
+    return filename.lower().endswith(IMAGE_EXTENSIONS)
+
+
+class ExtractionResult:
+    """Outcome of extracting one input file"""
+
+    def __init__(self, file_path, document=None, error=None, skipped=None, cached=False):
+        self.file_path = file_path
+        # SourceDocument with the extracted text, when extraction succeeded
+        self.document = document
+        self.error = error
+        self.skipped = skipped
+        self.cached = cached
+
+    @property
+    def file_hash(self):
+        return self.document.file_hash if self.document else None
+
+    @property
+    def pages(self):
+        """Number of PDF pages parsed (0 for other formats)"""
+        return self.document.pages if self.document else 0
+
+    @property
+    def filename(self):
+        return os.path.basename(self.file_path)
+
+    @property
+    def ok(self):
+        return self.document is not None
+
+
+def file_format(filename):
+    """'pdf', 'word' or 'text': how extract_file reads the file"""
+    lower = filename.lower()
+    if lower.endswith(PDF_EXTENSIONS):
+        return "pdf"
+    if lower.endswith(WORD_EXTENSIONS):
+        return "word"
+    return "text"
+
+
+def iter_pdf_pages(file_path, page_limit=None, backend=None):
+    """Yield (page_number, text) for the pages of a PDF, parsing one page at a time.
+
+    With page_limit, only the first and the last page_limit pages are read:
+    title, authors and DOI are at the start of a paper, the references at the end.
+    backend is a pdf_backends name (default: the fastest one installed).
+    """
+    def numbers(count):
+        if page_limit and count > 2 * page_limit:
+            return list(range(page_limit)) + list(range(count - page_limit, count))
+        return range(count)
+
+    return iter_pages(backend or default_pdf_backend(), file_path, numbers)
+
+
+def process_pdf_file(file_path, original_filename, page_limit=None, backend=None):
+    """Extract text from PDF (only the first and last page_limit pages, if given)"""
+    try:
+        # Joined once at the end: appending to a string copies the whole text at every page
+        parts = []
+        expected = 0
+        for number, page_text in iter_pdf_pages(file_path, page_limit, backend):
+            if number != expected:
+                parts.append(OMITTED_PAGES.format(count=number - expected))
+            expected = number + 1
+            # Pages are separated by a form feed so long documents can be split on page boundaries
+            parts.append(page_text)
+            parts.append("\n" + PAGE_BREAK)
+        return "".join(parts)
+
+    except Exception as e:
+        raise Exception(f"Error processing PDF {original_filename}: {e}")
+
+
+def process_word_file(file_path, original_filename):
+    """Extract text from Word document"""
+    try:
+        doc = Document(file_path)
+        return "\n".join([paragraph.text for paragraph in doc.paragraphs])
+
+    except Exception as e:
+        raise Exception(f"Error processing Word document {original_filename}: {e}")
+
+
+def sniff_bom(data):
+    """Encoding announced by a byte order mark at the start of data, or None"""
+    for bom, encoding in _BOMS:
+        if data[:len(bom)] == bom:
+            return encoding
+    return None
+
+
+def _decode(data, encoding, errors='strict'):
+    """Decode bytes, or an mmap chunk by chunk so a mapped file is never copied whole"""
+    if isinstance(data, bytes):
+        return data.decode(encoding, errors)
+    decoder = codecs.getincrementaldecoder(encoding)(errors)
+    parts = [decoder.decode(data[i:i + DECODE_CHUNK]) for i in range(0, len(data), DECODE_CHUNK)]
+    parts.append(decoder.decode(b"", final=True))
+    return "".join(parts)
+
+
+def decode_text(data):
+    """Decode raw file content: per its BOM, else UTF-8, else Windows-1252 (Latin-1 if that fails)"""
+    encoding = sniff_bom(data)
+    if encoding:
+        return _decode(data, encoding, 'replace')
+    try:
+        return _decode(data, 'utf-8')
+    except UnicodeDecodeError:
+        pass
+    try:
+        # What Windows editors write; same as Latin-1 except for quotes, dashes, euro...
+        return _decode(data, 'cp1252')
+    except UnicodeDecodeError:
+        # Latin-1 maps every byte, so this never fails
+        return _decode(data, 'latin-1')
+
+
+def copy_text_file(file_path, original_filename):
+    """Read text file as is, reading it once and detecting its encoding"""
+    try:
+        with open(file_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < MMAP_THRESHOLD:
+                return decode_text(f.read())
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return decode_text(mapped)
+
+    except Exception as e:
+        raise Exception(f"Error processing text file {original_filename}: {e}")
+
+
+def extract_file(file_path, cache=None, pdf_pages=None, pdf_backend=None):
+    """Extract one input file into a SourceDocument; never raises, errors go in the result.
+
+    With a cache, files whose content was extracted before (by the same
+    extractor version) are served from it without being parsed again.
+    With pdf_pages, only the first and last pdf_pages pages of PDFs are read,
+    with the pdf_backends backend pdf_backend (default: the fastest installed).
+    """
+    filename = os.path.basename(file_path)
+    lower = filename.lower()
+    try:
+        file_hash = file_sha256(file_path)
+        cache_key = file_hash
+        if lower.endswith(PDF_EXTENSIONS):
+            # Backends differ in the text they return
+            pdf_backend = pdf_backend or default_pdf_backend()
+            cache_key = f"{file_hash}-{pdf_backend}"
+            if pdf_pages:
+                cache_key += f"-p{pdf_pages}"
+        text = cache.get(cache_key) if cache is not None else None
+        cached = text is not None
+
+        if not cached:
+            if lower.endswith(PDF_EXTENSIONS):
+                if not pdf_support:
+                    return ExtractionResult(file_path, skipped="PDF support not available")
+                text = process_pdf_file(file_path, filename, pdf_pages, pdf_backend)
+            elif lower.endswith(WORD_EXTENSIONS):
+                if not word_support:
+                    return ExtractionResult(file_path, skipped="Word support not available")
+                text = process_word_file(file_path, filename)
+            else:
+                # Assume it's already a text file
+                text = copy_text_file(file_path, filename)
+            if cache is not None:
+                cache.put(cache_key, text)
+
+        # Handed to the LLM stage in memory; DocumentStore decides what goes to disk
+        metadata = {"format": file_format(filename), "bytes": os.path.getsize(file_path)}
+        if pdf_backend and lower.endswith(PDF_EXTENSIONS):
+            metadata["pdf_backend"] = pdf_backend
+        document = SourceDocument(file_path, text, file_hash, metadata)
+        return ExtractionResult(file_path, document, cached=cached)
+    except Exception as e:
+        return ExtractionResult(file_path, error=str(e))
+
+
+def open_cache(cache_dir=None):
+    """Extraction cache for the current extractor version"""
+    return ExtractionCache(EXTRACTOR_VERSION, cache_dir)
+
+
+def _submit(pool, file_path, cache, pdf_pages, pdf_backend):
+    """Submit one file, turning a broken pool into a failed future for that file"""
+    try:
+        return pool.submit(extract_file, file_path, cache, pdf_pages, pdf_backend)
+    except BrokenProcessPool as e:
+        future = Future()
+        future.set_exception(e)
+        return future
+
+
+def _worker_failed(file_path, error):
+    return ExtractionResult(file_path, error=f"Extraction worker failed for {os.path.basename(file_path)}: {error}")
+
+
+def _finished(future):
+    """The future's result if it completed before the pool broke, else None"""
+    if future.done() and not future.cancelled() and future.exception() is None:
+        return future.result()
+    return None
+
+
+def iter_extracted(file_paths, workers=None, prefetch=None, cache=None, pdf_pages=None, pdf_backend=None):
+    """Extract files in a process pool, yielding results in input order as they become ready.
+
+    At most `prefetch` files (default twice the worker count) are submitted
+    ahead of the consumer, so a slow consumer holds the pool back instead of
+    letting extraction run arbitrarily far ahead. With a cache (see
+    open_cache), unchanged files are not parsed again. A file that fails
+    yields a result with .error set instead of aborting the remaining files.
+    A file that takes its worker process down breaks the whole pool: the
+    pool is then replaced and the files that were in flight are extracted
+    again one at a time, so only the one that crashes is marked failed.
+    pdf_pages and pdf_backend are passed to extract_file.
+    """
+    workers = workers or default_workers()
+    file_paths = list(file_paths)
+
+    if workers == 1 or len(file_paths) <= 1:
+        for file_path in file_paths:
+            yield extract_file(file_path, cache, pdf_pages, pdf_backend)
+        return
+
+    workers = min(workers, len(file_paths))
+    prefetch = max(prefetch or workers * 2, 1)
+    remaining = deque(file_paths)
+    pending = deque()
+    # Files in flight when a worker died, in input order: (path, result it finished with, or None)
+    suspects = deque()
+    pool = None
+    try:
+        while suspects or pending or remaining:
+            if pool is None:
+                pool = ProcessPoolExecutor(max_workers=workers)
+            if suspects:
+                file_path, result = suspects.popleft()
+                if result is None:
+                    # Alone in the pool: if a worker dies now, this file took it down
+                    try:
+                        result = _submit(pool, file_path, cache, pdf_pages, pdf_backend).result()
+                    except BrokenProcessPool as e:
+                        result = _worker_failed(file_path, e)
+                        pool.shutdown(wait=True)
+                        pool = None
+                    except Exception as e:
+                        result = _worker_failed(file_path, e)
+                yield result
+                continue
+
+            while remaining and len(pending) < prefetch:
+                file_path = remaining.popleft()
+                pending.append((file_path, _submit(pool, file_path, cache, pdf_pages, pdf_backend)))
+            file_path, future = pending.popleft()
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                # Any file in flight may have crashed it: retry them alone in a new pool
+                suspects.append((file_path, None))
+                suspects.extend((path, _finished(other)) for path, other in pending)
+                pending.clear()
+                pool.shutdown(wait=True)
+                pool = None
+                continue
+            except Exception as e:
+                result = _worker_failed(file_path, e)
+            yield result
+    finally:
+        for _, future in pending:
+            future.cancel()
+        if pool is not None:
+            pool.shutdown(wait=True)
@@ -0,0 +1,452 @@
+"""Per-document ficha generation."""
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import text_sha256
+from chunking import (chunk_budget, estimate_tokens, group_to_budget, parse_num_ctx, split_text,
+                      CHARS_PER_TOKEN, DEFAULT_CONTEXT_LENGTH)
+from ollama_client import OllamaError, OllamaConnectionError
+from concurrency import AdaptiveLimiter, default_max_concurrency
+
+SOURCE_SUFFIX = "_source.txt"
+FICHA_SUFFIX = "_ficha.txt"
+COMBINED_FICHA = "combined_ficha.txt"
+IMAGES_FICHA = "images_ficha.txt"
+# A ficha is streamed into <name>.part and renamed only once complete
+PART_SUFFIX = ".part"
+
+# Attempts after a server error or timeout, RETRY_DELAY * attempt seconds apart (only before any text arrived)
+MAX_RETRIES = 2
+RETRY_DELAY = 1.0
+
+
+def server_parallel_slots(default=4):
+    """Number of requests the Ollama server decodes in parallel (OLLAMA_NUM_PARALLEL)"""
+    try:
+        return max(1, int(os.environ.get("OLLAMA_NUM_PARALLEL", default)))
+    except ValueError:
+        return default
+
+
+def ficha_filename(original_filename):
+    """Map 'artigo.pdf' to 'artigo.pdf_ficha.txt'.
+
+    The extension is kept so artigo.pdf and artigo.docx never share a ficha.
+    """
+    return original_filename + FICHA_SUFFIX
+
+
+def image_ficha_filename(images):
+    """'scan.png' gives 'scan.png_ficha.txt'; a batch of 3 starting at it gives 'scan.png+2_ficha.txt'.
+
+    The extension is kept so the ficha of scan.png never replaces the one of scan.pdf.
+    """
+    stem = images[0].name
+    if len(images) > 1:
+        stem += f"+{len(images) - 1}"
+    return stem + FICHA_SUFFIX
+
+
+def chat_messages(instruction, document_text, images=None):
+    """Instruction as the system message, document as the user message.
+
+    The system message comes first and is the same for every document of a
+    run, so the server keeps the instruction's prefill in its prompt cache
+    and only processes the document part of each request.
+    """
+    user = {"role": "user", "content": document_text}
+    if images:
+        user["images"] = images
+    return [{"role": "system", "content": instruction}, user]
+
+
+class GenerationAborted(Exception):
+    """Generation was stopped before the model finished"""
+
+
+def is_overload(error):
+    """Whether an OllamaError means the server is unreachable, timed out or failed (5xx, runner errors)"""
+    if isinstance(error, OllamaConnectionError):
+        return True
+    return error.status is None or error.status >= 500
+
+
+class GenerationStats:
+    """Timing of one LLM request: time to first token and decoding speed"""
+
+    def __init__(self, ttft=None, tokens=0, elapsed=0.0, eval_seconds=None):
+        self.ttft = ttft
+        self.tokens = tokens
+        self.elapsed = elapsed
+        self.eval_seconds = eval_seconds
+
+    @classmethod
+    def from_response(cls, final, started, ttft=None, pieces=0):
+        """Stats from Ollama's final chunk (eval_count/eval_duration), falling back to wall time"""
+        eval_duration = final.get("eval_duration")
+        return cls(
+            ttft=ttft,
+            tokens=final.get("eval_count") or pieces,
+            elapsed=time.time() - started,
+            eval_seconds=eval_duration / 1e9 if eval_duration else None,
+        )
+
+    @property
+    def tokens_per_second(self):
+        seconds = self.eval_seconds
+        if not seconds:
+            seconds = self.elapsed - (self.ttft or 0.0)
+        return self.tokens / seconds if seconds > 0 else 0.0
+
+    def describe(self):
+        ttft = f"first token {self.ttft:.1f}s, " if self.ttft is not None else ""
+        return f"{ttft}{self.tokens} tokens, {self.tokens_per_second:.1f} tok/s"
+
+
+class FichaResult:
+    """Outcome of generating the ficha for one document"""
+
+    def __init__(self, name, ficha_path=None, error=None, cached=False, file_path=None, file_hash=None,
+                 stats=None):
+        # Document name (the input file name)
+        self.name = name
+        self.ficha_path = ficha_path
+        self.error = error
+        self.cached = cached
+        # Original input file and its content hash, when known
+        self.file_path = file_path
+        self.file_hash = file_hash
+        # GenerationStats of the request that produced the ficha (None when cached)
+        self.stats = stats
+
+
+# Instructions for the map step (one per chunk) and the reduce step (merging partial notes); they
+# are system messages, so nothing that changes between requests (like the part number) goes here
+MAP_PROMPT = (
+    "O texto do usuário é uma parte de um documento mais longo (o número da parte vem no início). "
+    "Extraia desta parte, em português, apenas as informações úteis para a tarefa abaixo "
+    "(título, autores, DOI, objetivo, métodos, resultados, conclusões, referências importantes), "
+    "sem inventar nada que não esteja no texto.\nTarefa: {prompt}"
+)
+COLLAPSE_PROMPT = (
+    "As notas do usuário foram extraídas de partes consecutivas de um mesmo documento. "
+    "Junte-as em notas únicas, em português, mantendo todas as informações úteis para a tarefa abaixo, "
+    "sem inventar nada.\nTarefa: {prompt}"
+)
+MAP_PART = "[Parte {index} de {total}]\n\n{chunk}"
+REDUCE_PROMPT = (
+    "As notas do usuário foram extraídas, em ordem, das partes de um mesmo documento. "
+    "Use-as como se fossem o documento completo.\n{prompt}"
+)
+# Combined mode with more images than fit one request: notes per batch, read with the text
+IMAGE_NOTES_PROMPT = (
+    "As imagens enviadas pelo usuário fazem parte do material de uma tarefa. "
+    "Descreva, em português, apenas o que nelas é útil para a tarefa abaixo "
+    "(texto visível, título, autores, tabelas, gráficos, conclusões), sem inventar nada.\nTarefa: {prompt}"
+)
+
+
+class Summarizer:
+    """Turns document text into a ficha, splitting documents too long for the model's context.
+
+    Short documents take a single request. Long ones are split on page and
+    paragraph boundaries to fit the context window, the chunks are
+    summarized in parallel (map) and the partial notes merged into the final
+    ficha (reduce). All requests of all documents share the slots of an
+    AdaptiveLimiter, which starts at max_in_flight and moves between 1 and
+    max_concurrency with the server's throughput and errors.
+    """
+
+    def __init__(self, client, model, prompt_text, response_cache=None, max_in_flight=None,
+                 context_length=None, options=None, on_tokens=None, max_concurrency=None):
+        self.client = client
+        self.model = model
+        self.prompt_text = prompt_text
+        self.response_cache = response_cache
+        initial = max_in_flight or server_parallel_slots()
+        self.limiter = AdaptiveLimiter(initial, maximum=max_concurrency or default_max_concurrency(initial))
+        # Threads that may wait for a slot: enough for the highest limit
+        self.max_in_flight = self.limiter.maximum
+        self.options = options
+        # on_tokens(count) is told about every generated token, map/collapse steps included
+        self.on_tokens = on_tokens
+        self._context_length = context_length
+        self._lock = threading.Lock()
+        self._map_pool = ThreadPoolExecutor(max_workers=self.max_in_flight)
+        self.stop_event = threading.Event()
+        # Set once a generation request went to the server
+        self.requests_sent = False
+        # Cleared while paused: new requests wait, requests in flight finish
+        self._running = threading.Event()
+        self._running.set()
+
+    def close(self):
+        self._map_pool.shutdown(wait=True)
+
+    @property
+    def context_length(self):
+        """Context window of the model: num_ctx from its Modelfile, else Ollama's default"""
+        with self._lock:
+            if self._context_length is None:
+                try:
+                    details = self.client.show(self.model)
+                    self._context_length = parse_num_ctx(details.get("parameters"))
+                except OllamaConnectionError:
+                    raise
+                except OllamaError:
+                    pass
+                if self._context_length is None:
+                    try:
+                        self._context_length = int(os.environ.get("OLLAMA_CONTEXT_LENGTH", DEFAULT_CONTEXT_LENGTH))
+                    except ValueError:
+                        self._context_length = DEFAULT_CONTEXT_LENGTH
+            return self._context_length
+
+    def stop(self):
+        """Abort requests in progress and refuse new ones"""
+        self.stop_event.set()
+        self._running.set()
+
+    def pause(self):
+        """Hold new requests until resume(); requests in flight finish normally"""
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    def _check_stop(self):
+        if self.stop_event.is_set():
+            raise GenerationAborted("Generation stopped")
+
+    def wait_while_paused(self):
+        """Block while paused; raises GenerationAborted if stopped meanwhile"""
+        self._running.wait()
+        self._check_stop()
+
+    def _content_hash(self, document_text, images):
+        """Cache identity of a request's content: the text plus any attached images"""
+        content_hash = text_sha256(document_text)
+        if images:
+            content_hash = text_sha256(content_hash + "".join(image.sha256 for image in images))
+        return content_hash
+
+    def ask(self, instruction, document_text, on_text=None, images=None):
+        """One (cached) LLM request, returning (text, cached, stats).
+
+        With on_text the answer is streamed and on_text(piece) is called as
+        pieces arrive (once with the whole text on a cache hit). images are
+        images.PreparedImage objects attached to the request.
+        """
+        key = None
+        if self.response_cache is not None:
+            key = self.response_cache.key(self.model, instruction, self._content_hash(document_text, images),
+                                          self.options)
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                if on_text:
+                    on_text(cached)
+                return cached, True, None
+
+        encoded_images = [image.base64() for image in images] if images else None
+        messages = chat_messages(instruction, document_text, encoded_images)
+        # Prefill time grows with the prompt: latency is compared per 1000 prompt tokens
+        prompt_units = max(1.0, estimate_tokens(instruction + document_text) / 1000)
+        attempt = 0
+        while True:
+            self.wait_while_paused()
+            streamed = []
+            self.limiter.acquire()
+            try:
+                self._check_stop()
+                started = time.time()
+                self.requests_sent = True
+                if on_text is None:
+                    final = self.client.chat(self.model, messages, options=self.options)
+                    response = final.get("message", {}).get("content", "")
+                    stats = GenerationStats.from_response(final, started)
+                    if self.on_tokens:
+                        self.on_tokens(stats.tokens)
+                else:
+                    response, stats = self._stream(messages, on_text, started, streamed)
+            except OllamaError as e:
+                if not is_overload(e):
+                    raise
+                self.limiter.failed(started)
+                # Text already written cannot be taken back
+                if streamed or attempt >= MAX_RETRIES:
+                    raise
+            else:
+                self.limiter.succeeded(stats.tokens, self._latency(stats, prompt_units), started)
+                break
+            finally:
+                self.limiter.release()
+            attempt += 1
+            self.stop_event.wait(RETRY_DELAY * attempt)
+
+        if key is not None:
+            self.response_cache.put(key, response)
+        return response, False, stats
+
+    def _latency(self, stats, prompt_units):
+        """Wait before decoding (queue, load, prefill) per 1000 prompt tokens, or None if unknown"""
+        if stats.ttft is not None:
+            return stats.ttft / prompt_units
+        if stats.eval_seconds:
+            return max(0.0, stats.elapsed - stats.eval_seconds) / prompt_units
+        return None
+
+    def _stream(self, messages, on_text, started, pieces=None):
+        """Stream one chat request into on_text; pieces collects the text received so far"""
+        pieces = [] if pieces is None else pieces
+        ttft = None
+        final = {}
+        stream = self.client.chat_stream(self.model, messages, options=self.options)
+        try:
+            for chunk in stream:
+                self._check_stop()
+                piece = chunk.get("message", {}).get("content", "")
+                if piece:
+                    if ttft is None:
+                        ttft = time.time() - started
+                    pieces.append(piece)
+                    on_text(piece)
+                    if self.on_tokens:
+                        self.on_tokens(1)
+                if chunk.get("done"):
+                    final = chunk
+        finally:
+            stream.close()
+        return "".join(pieces), GenerationStats.from_response(final, started, ttft, len(pieces))
+
+    def summarize(self, document_text, on_text=None, images=None):
+        """Ficha for document_text, returning (text, cached, stats); on_text streams it as in ask().
+
+        images go with the single request, or with the final (reduce) request
+        of a long document.
+        """
+        budget = chunk_budget(self.context_length, self.prompt_text)
+        if estimate_tokens(document_text) <= budget:
+            return self.ask(self.prompt_text, document_text, on_text, images)
+
+        # Whole-document answers are cached too, so re-runs skip the map step
+        key = None
+        if self.response_cache is not None:
+            key = self.response_cache.key(self.model, self.prompt_text, self._content_hash(document_text, images),
+                                          self.options)
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                if on_text:
+                    on_text(cached)
+                return cached, True, None
+
+        chunks = split_text(document_text, chunk_budget(self.context_length, MAP_PROMPT + self.prompt_text))
+        notes = self._map(chunks)
+        response, stats = self._reduce(notes, on_text, images)
+
+        if key is not None:
+            self.response_cache.put(key, response)
+        return response, False, stats
+
+    def _map(self, chunks):
+        total = len(chunks)
+        map_prompt = MAP_PROMPT.format(prompt=self.prompt_text)
+        futures = [
+            self._map_pool.submit(self.ask, map_prompt, MAP_PART.format(index=i, total=total, chunk=chunk))
+            for i, chunk in enumerate(chunks, 1)
+        ]
+        return [future.result()[0] for future in futures]
+
+    def _reduce(self, notes, on_text=None, images=None):
+        reduce_prompt = REDUCE_PROMPT.format(prompt=self.prompt_text)
+        budget = chunk_budget(self.context_length, reduce_prompt)
+        # Collapse the notes in groups until they fit a single request
+        while len(notes) > 1 and estimate_tokens("\n\n".join(notes)) > budget:
+            groups = group_to_budget(notes, budget)
+            if len(groups) == len(notes):
+                # No two notes fit together: trim them instead of collapsing forever
+                max_chars = int(budget / len(notes) * CHARS_PER_TOKEN)
+                notes = [note[:max_chars] for note in notes]
+                break
+            notes = self._collapse(groups)
+        response, _, stats = self.ask(reduce_prompt, "\n\n".join(notes), on_text, images)
+        return response, stats
+
+    def _collapse(self, groups):
+        collapse_prompt = COLLAPSE_PROMPT.format(prompt=self.prompt_text)
+        futures = [self._map_pool.submit(self.ask, collapse_prompt, "\n\n".join(group)) for group in groups]
+        return [future.result()[0] for future in futures]
+
+
+def write_ficha(output_path, produce):
+    """Call produce(write_piece), streaming the pieces into output_path + '.part'.
+
+    The part file replaces output_path only if produce() returns, so a failed
+    or cancelled generation leaves the ficha of the last good run untouched.
+    Returns what produce() returned.
+    """
+    part_path = output_path + PART_SUFFIX
+    try:
+        with open(part_path, 'w', encoding='utf-8', errors='replace') as f:
+            def write_piece(piece):
+                f.write(piece)
+                f.flush()
+
+            result = produce(write_piece)
+        os.replace(part_path, output_path)
+        return result
+    except BaseException:
+        try:
+            os.remove(part_path)
+        except OSError:
+            pass
+        raise
+
+
+def generate_ficha(summarizer, document, fichas_dir, on_text=None):
+    """Summarize one extracted document (a document.SourceDocument) into its _ficha.txt.
+
+    The answer is streamed into the file as it is generated; on_text(name, piece)
+    is also called with each piece.
+    """
+    name = document.name
+    document_text = document.text
+
+    output_path = os.path.join(fichas_dir, ficha_filename(name))
+
+    def produce(write):
+        def write_piece(piece):
+            write(piece)
+            if on_text:
+                on_text(name, piece)
+
+        return summarizer.summarize(document_text, write_piece)
+
+    _, cached, stats = write_ficha(output_path, produce)
+
+    return FichaResult(name, output_path, cached=cached,
+                       file_path=document.file_path, file_hash=document.file_hash, stats=stats)
+
+
+def generate_image_ficha(summarizer, images, fichas_dir, on_text=None):
+    """Ficha for one image, or a small batch of images.PreparedImage, sent in a single request"""
+    name = ", ".join(image.name for image in images)
+    output_path = os.path.join(fichas_dir, image_ficha_filename(images))
+
+    def produce(write):
+        def write_piece(piece):
+            write(piece)
+            if on_text:
+                on_text(name, piece)
+
+        return summarizer.summarize("", write_piece, images)
+
+    _, cached, stats = write_ficha(output_path, produce)
+
+    return FichaResult(name, output_path, cached=cached, file_path=images[0].file_path,
+                       file_hash=images[0].sha256, stats=stats)
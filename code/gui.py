@@ -0,0 +1,291 @@
+"""Tk front-end shared by mac_stagiaria.py, windows_stagiaria.py and development/ia_stagiaria_image.py.
+
+The launchers only choose the default model; all processing happens in job.ProcessingJob.
+"""
+import os
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+import threading
+
+from backends import open_client, configured_hosts
+from env_file import load_env_file
+from fichas import server_parallel_slots
+from concurrency import default_max_concurrency
+from extraction import default_workers, pdf_support, word_support
+from job import ProcessingJob, JobCancelled, DEFAULT_PROMPT, MODEL_RELEASE_SECONDS, default_model
+from ui_events import UiEventChannel, POLL_MS
+
+class TextProcessorGUI:
+    def __init__(self, root, model=None, per_document=True):
+        self.root = root
+        self.root.title("Qwen3-stagiaria 1.0 - Multimodal Document Processor")
+        self.root.geometry("600x500")
+        
+        # Ollama model (STAGIARIA_MODEL, else the launcher's default) and persistent HTTP clients to the
+        # server, or to each server of STAGIARIA_HOSTS
+        self.model_name = default_model(model)
+        # One in-flight request per parallel slot of each server (OLLAMA_NUM_PARALLEL) to start with;
+        # the pool keeps a connection for each request the adaptive limit can reach
+        hosts = configured_hosts()
+        self.max_in_flight = server_parallel_slots() * len(hosts)
+        self.max_concurrency = max(self.max_in_flight, default_max_concurrency(self.max_in_flight))
+        self.llm_client = open_client(hosts, pool_size=self.max_concurrency)
+        # Processes used to extract PDF/Word/text files (STAGIARIA_EXTRACTION_WORKERS)
+        self.extraction_workers = default_workers()
+        
+        # Default prompt text from the original script
+        self.default_prompt = DEFAULT_PROMPT
+        
+        # Create main frame
+        main_frame = ttk.Frame(root, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        # Configure grid weights
+        root.columnconfigure(0, weight=1)
+        root.rowconfigure(0, weight=1)
+        main_frame.columnconfigure(1, weight=1)
+        
+        # Input directory selection
+        ttk.Label(main_frame, text="Input Directory (with PDF/Word/Image files):").grid(row=0, column=0, sticky=tk.W, pady=5)
+        self.input_dir_var = tk.StringVar()
+        input_entry = ttk.Entry(main_frame, textvariable=self.input_dir_var, width=50)
+        input_entry.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
+        input_browse_btn = ttk.Button(main_frame, text="Browse", command=self.browse_input_dir)
+        input_browse_btn.grid(row=1, column=2, sticky=tk.W, pady=5, padx=(5,0))
+        
+        # Output directory selection
+        ttk.Label(main_frame, text="Output Directory:").grid(row=2, column=0, sticky=tk.W, pady=5)
+        self.output_dir_var = tk.StringVar()
+        output_entry = ttk.Entry(main_frame, textvariable=self.output_dir_var, width=50)
+        output_entry.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
+        output_browse_btn = ttk.Button(main_frame, text="Browse", command=self.browse_output_dir)
+        output_browse_btn.grid(row=3, column=2, sticky=tk.W, pady=5, padx=(5,0))
+        
+        # Prompt text
+        ttk.Label(main_frame, text="Prompt Text:").grid(row=4, column=0, sticky=tk.W, pady=5)
+        self.prompt_text_var = tk.StringVar(value=self.default_prompt)
+        prompt_textbox = tk.Text(main_frame, height=6, width=60)
+        prompt_textbox.grid(row=5, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5)
+        prompt_textbox.insert(tk.END, self.default_prompt)
+        
+        # Output mode: one ficha per document or a single combined ficha
+        self.per_document_var = tk.BooleanVar(value=per_document)
+        per_document_check = ttk.Checkbutton(main_frame, text="One ficha per document", variable=self.per_document_var)
+        per_document_check.grid(row=6, column=0, sticky=tk.W, pady=5)
+        
+        # Reuse LLM responses cached from earlier runs; unchecked regenerates (and refreshes the cache)
+        self.use_cache_var = tk.BooleanVar(value=True)
+        use_cache_check = ttk.Checkbutton(main_frame, text="Reuse cached LLM responses", variable=self.use_cache_var)
+        use_cache_check.grid(row=6, column=1, columnspan=2, sticky=tk.W, pady=5)
+        
+        # Incremental mode: skip inputs already summarized (see the manifest in the output directory)
+        self.incremental_var = tk.BooleanVar(value=True)
+        incremental_check = ttk.Checkbutton(main_frame, text="Only new or changed files", variable=self.incremental_var)
+        incremental_check.grid(row=7, column=0, sticky=tk.W, pady=5)
+        
+        # Extracted text is passed to the LLM in memory; optionally keep a copy next to the fichas
+        self.keep_sources_var = tk.BooleanVar(value=False)
+        keep_sources_check = ttk.Checkbutton(main_frame, text="Keep extracted text (_source.txt)", variable=self.keep_sources_var)
+        keep_sources_check.grid(row=7, column=1, columnspan=2, sticky=tk.W, pady=5)
+        
+        # Process, pause and cancel buttons
+        buttons_frame = ttk.Frame(main_frame)
+        buttons_frame.grid(row=8, column=0, columnspan=3, pady=20)
+        self.process_btn = ttk.Button(buttons_frame, text="Process Files", command=self.start_processing)
+        self.process_btn.pack(side=tk.LEFT, padx=5)
+        self.pause_btn = ttk.Button(buttons_frame, text="Pause", command=self.toggle_pause, state='disabled')
+        self.pause_btn.pack(side=tk.LEFT, padx=5)
+        self.cancel_btn = ttk.Button(buttons_frame, text="Cancel", command=self.cancel_processing, state='disabled')
+        self.cancel_btn.pack(side=tk.LEFT, padx=5)
+        self.job = None
+        self.last_job = None
+        
+        # Progress bar
+        self.progress = ttk.Progressbar(main_frame, mode='determinate', maximum=100)
+        self.progress.grid(row=9, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=5)
+        
+        # Status label
+        self.status_var = tk.StringVar(value="Ready")
+        status_label = ttk.Label(main_frame, textvariable=self.status_var)
+        status_label.grid(row=10, column=0, columnspan=3, pady=5)
+        
+        # Throughput and ETA
+        self.metrics_var = tk.StringVar(value="")
+        metrics_label = ttk.Label(main_frame, textvariable=self.metrics_var)
+        metrics_label.grid(row=11, column=0, columnspan=3, pady=5)
+        
+        # Configure grid weights for resizing
+        main_frame.rowconfigure(5, weight=1)
+        main_frame.columnconfigure(0, weight=1)
+        
+        # Check if required libraries are available
+        self.check_dependencies()
+        
+        # Updates from the processing thread, applied here on the Tk thread
+        self.ui_events = UiEventChannel()
+        self.root.after(POLL_MS, self.poll_ui_events)
+        
+    def poll_ui_events(self):
+        """Apply pending updates from the processing thread"""
+        self.ui_events.drain()
+        self.root.after(POLL_MS, self.poll_ui_events)
+        
+    def check_dependencies(self):
+        """Check if required libraries are available for PDF/Word parsing"""
+        missing_libs = []
+        if not pdf_support:
+            missing_libs.append("PyPDF2")
+        if not word_support:
+            missing_libs.append("python-docx")
+            
+        if missing_libs:
+            messagebox.showwarning(
+                "Missing Dependencies",
+                f"Following libraries are not installed for PDF/Word parsing:\n{', '.join(missing_libs)}\n\n"
+                "To enable PDF/Word support, please install them using:\npip install PyPDF2 python-docx"
+            )
+    
+    def browse_input_dir(self):
+        """Open dialog to select input directory"""
+        directory = filedialog.askdirectory()
+        if directory:
+            self.input_dir_var.set(directory)
+    
+    def browse_output_dir(self):
+        """Open dialog to select output directory"""
+        directory = filedialog.askdirectory()
+        if directory:
+            self.output_dir_var.set(directory)
+    
+    def start_processing(self):
+        """Start processing in a separate thread"""
+        # Validate inputs
+        input_dir = self.input_dir_var.get().strip()
+        output_dir = self.output_dir_var.get().strip()
+        prompt_text = self.prompt_text_var.get().strip()
+        
+        if not input_dir:
+            messagebox.showerror("Error", "Please select an input directory")
+            return
+            
+        if not output_dir:
+            messagebox.showerror("Error", "Please select an output directory")
+            return
+            
+        if not os.path.exists(input_dir):
+            messagebox.showerror("Error", "Input directory does not exist")
+            return
+            
+        if not os.path.exists(output_dir):
+            try:
+                os.makedirs(output_dir)
+            except Exception as e:
+                messagebox.showerror("Error", f"Cannot create output directory: {e}")
+                return
+                
+        # Start processing in a separate thread
+        self.process_btn.config(state='disabled')
+        self.progress['value'] = 0
+        self.metrics_var.set("")
+        self.status_var.set("Processing files...")
+        
+        # Tk variables are read here: the worker thread must not touch Tk
+        self.job = ProcessingJob(
+            self.llm_client, self.model_name, prompt_text,
+            per_document=self.per_document_var.get(),
+            incremental=self.incremental_var.get(),
+            reuse_responses=self.use_cache_var.get(),
+            keep_sources=self.keep_sources_var.get(),
+            extraction_workers=self.extraction_workers,
+            max_in_flight=self.max_in_flight,
+            max_concurrency=self.max_concurrency,
+            on_status=self.update_status,
+            on_progress=self.update_progress
+        )
+        self.pause_btn.config(state='normal', text="Pause")
+        self.cancel_btn.config(state='normal')
+        
+        thread = threading.Thread(
+            target=self.process_files,
+            args=(self.job, input_dir, output_dir)
+        )
+        thread.daemon = True
+        thread.start()
+    
+    def toggle_pause(self):
+        """Pause or resume the running job"""
+        if self.job is None:
+            return
+        if self.pause_btn.cget('text') == "Pause":
+            self.job.pause()
+            self.pause_btn.config(text="Resume")
+            self.update_status("Paused (requests already sent will finish)")
+        else:
+            self.job.resume()
+            self.pause_btn.config(text="Pause")
+            self.update_status("Resumed")
+    
+    def cancel_processing(self):
+        """Cancel the running job; what is done is kept and the next run resumes from there"""
+        if self.job is None:
+            return
+        self.job.stop()
+        self.pause_btn.config(state='disabled')
+        self.cancel_btn.config(state='disabled')
+        self.update_status("Cancelling...")
+    
+    def process_files(self, job, input_dir, output_dir):
+        """Process all files in the input directory (runs in a worker thread)"""
+        try:
+            summary = job.run(input_dir, output_dir)
+            
+            if summary.ficha_errors:
+                names = ", ".join(name for name, _ in summary.ficha_errors)
+                raise Exception(f"{len(summary.ficha_errors)} documents failed ({names}): {summary.ficha_errors[0][1]}")
+            
+            if summary.extraction_errors:
+                self.ui_events.put(self.status_var.set, f"Processing complete! {len(summary.extraction_errors)} file(s) could not be extracted")
+                self.ui_events.put(
+                    messagebox.showwarning,
+                    "Extraction Errors",
+                    "\n".join(error for _, error in summary.extraction_errors)
+                )
+            else:
+                self.ui_events.put(self.status_var.set, "Processing complete!")
+            
+        except JobCancelled:
+            self.ui_events.put(self.status_var.set, "Cancelled. Process the same folders again to resume.")
+        except Exception as e:
+            self.ui_events.put(self.status_var.set, f"Error: {str(e)}")
+            self.ui_events.put(messagebox.showerror, "Error", f"Processing failed: {e}")
+        finally:
+            self.ui_events.put(self.finish_processing)
+    
+    def finish_processing(self):
+        # Kept so closing the window right after the run still lets the model be unloaded
+        self.last_job = self.job
+        self.job = None
+        self.process_btn.config(state='normal')
+        self.pause_btn.config(state='disabled', text="Pause")
+        self.cancel_btn.config(state='disabled')
+    
+    def update_status(self, message):
+        """Show a status message (callable from any thread; only the latest one per frame is drawn)"""
+        self.ui_events.update("status", self.status_var.set, message)
+    
+    def update_progress(self, snapshot):
+        """Update progress bar and throughput/ETA line (callable from any thread)"""
+        self.ui_events.update("progress", self.show_progress, snapshot)
+    
+    def show_progress(self, snapshot):
+        self.progress['value'] = snapshot.fraction * 100
+        self.metrics_var.set(snapshot.describe())
+
+def main(model=None, per_document=True):
+    # .env settings (OPENAI_BASE_URL, STAGIARIA_BACKEND...) count as environment variables
+    load_env_file()
+    root = tk.Tk()
+    app = TextProcessorGUI(root, model, per_document)
+    root.mainloop()
+    if app.last_job is not None:
+        app.last_job.wait_for_model_release(MODEL_RELEASE_SECONDS)
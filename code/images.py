@@ -0,0 +1,175 @@
+"""Image stage for multimodal requests: downsample, recompress, convert TIFF and drop duplicates.
+
+Only exact duplicates are dropped: with Pillow, images with the same pixels
+(whatever their format or compression); without it, identical files.
+Near-duplicate detection would merge distinct scanned pages, which look
+alike at thumbnail size. Pillow is optional: without it JPEG and PNG files
+are sent as they are and TIFF files are skipped (Ollama does not decode
+TIFF).
+"""
+import io
+import os
+import base64
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image, ImageOps
+    pil_support = True
+except ImportError:
+    pil_support = False
+
+# Longest side sent to the model; vision encoders tile or downscale anything larger anyway
+DEFAULT_IMAGE_MAX_SIDE = 1344
+JPEG_QUALITY = 85
+
+# Images per multimodal request, and image requests in flight: vision encoders are memory hungry
+DEFAULT_IMAGES_PER_REQUEST = 1
+DEFAULT_IMAGE_CONCURRENCY = 1
+
+PASSTHROUGH_EXTENSIONS = ('.jpeg', '.jpg', '.png')
+EXIF_ORIENTATION = 0x0112
+
+
+def default_image_max_side():
+    """Longest image side from STAGIARIA_IMAGE_MAX_SIDE (default 1344)"""
+    try:
+        side = int(os.environ.get("STAGIARIA_IMAGE_MAX_SIDE", DEFAULT_IMAGE_MAX_SIDE))
+    except ValueError:
+        side = DEFAULT_IMAGE_MAX_SIDE
+    return side if side > 0 else DEFAULT_IMAGE_MAX_SIDE
+
+
+def _positive_env(name, default):
+    try:
+        value = int(os.environ.get(name, default))
+    except ValueError:
+        value = default
+    return value if value > 0 else default
+
+
+def default_images_per_request():
+    """Image budget of one request, from STAGIARIA_IMAGES_PER_REQUEST (default 1)"""
+    return _positive_env("STAGIARIA_IMAGES_PER_REQUEST", DEFAULT_IMAGES_PER_REQUEST)
+
+
+def default_image_concurrency():
+    """Image requests in flight, from STAGIARIA_IMAGE_CONCURRENCY (default 1)"""
+    return _positive_env("STAGIARIA_IMAGE_CONCURRENCY", DEFAULT_IMAGE_CONCURRENCY)
+
+
+def batch_images(images, per_request):
+    """Split images into consecutive batches of at most per_request images"""
+    per_request = max(1, per_request)
+    return [images[i:i + per_request] for i in range(0, len(images), per_request)]
+
+
+class PreparedImage:
+    """An input image ready to attach to a request"""
+
+    def __init__(self, file_path, data, width=None, height=None, fingerprint=None):
+        self.file_path = file_path
+        self.data = data
+        self.width = width
+        self.height = height
+        # Hash of the decoded pixels with Pillow, else of the file content
+        self.fingerprint = fingerprint
+        self.sha256 = hashlib.sha256(data).hexdigest()
+
+    @property
+    def name(self):
+        return os.path.basename(self.file_path)
+
+    def base64(self):
+        """Encoding used by the 'images' field of the Ollama API"""
+        return base64.b64encode(self.data).decode('ascii')
+
+
+class ImageResult:
+    """Outcome of preparing one image: .image, or why it was dropped"""
+
+    def __init__(self, file_path, image=None, error=None, skipped=None, duplicate_of=None):
+        self.file_path = file_path
+        self.image = image
+        self.error = error
+        self.skipped = skipped
+        self.duplicate_of = duplicate_of
+
+    @property
+    def filename(self):
+        return os.path.basename(self.file_path)
+
+
+def pixel_hash(image):
+    """sha256 of the size and RGBA pixels: the same picture saved as PNG or TIFF gives the same hash"""
+    digest = hashlib.sha256(f"{image.width}x{image.height}".encode('ascii'))
+    digest.update(image.convert('RGBA').tobytes())
+    return digest.hexdigest()
+
+
+def _encode(image, image_format, **options):
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **options)
+    return buffer.getvalue()
+
+
+def _reencode(file_path, max_side):
+    with Image.open(file_path) as original:
+        # Multi-page TIFF scans: the first page
+        original.seek(0)
+        image = ImageOps.exif_transpose(original)
+        fingerprint = pixel_hash(image)
+        lower = file_path.lower()
+        upright = original.getexif().get(EXIF_ORIENTATION, 1) == 1
+        if lower.endswith(PASSTHROUGH_EXTENSIONS) and max(image.size) <= max_side and upright:
+            # Already small and in a format the server decodes: send the file untouched
+            with open(file_path, 'rb') as f:
+                return PreparedImage(file_path, f.read(), image.width, image.height, fingerprint)
+
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+        has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+        data = _encode(image, 'PNG', optimize=True)
+        if not has_alpha:
+            # Photos and greyscale scans compress far better as JPEG, line art and text as PNG
+            if image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            data = min(data, _encode(image, 'JPEG', quality=JPEG_QUALITY, optimize=True), key=len)
+        return PreparedImage(file_path, data, image.width, image.height, fingerprint)
+
+
+def prepare_image(file_path, max_side=None):
+    """Read and shrink one image; never raises, errors go in the result"""
+    max_side = max_side or default_image_max_side()
+    try:
+        if pil_support:
+            return ImageResult(file_path, _reencode(file_path, max_side))
+        if not file_path.lower().endswith(PASSTHROUGH_EXTENSIONS):
+            return ImageResult(file_path, skipped="TIFF images need Pillow (pip install pillow)")
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        image = PreparedImage(file_path, data)
+        image.fingerprint = image.sha256
+        return ImageResult(file_path, image)
+    except Exception as e:
+        return ImageResult(file_path, error=f"Error processing image {os.path.basename(file_path)}: {e}")
+
+
+def prepare_images(file_paths, max_side=None, workers=None):
+    """Prepare images in a thread pool; returns ImageResults in input order, later duplicates marked"""
+    file_paths = list(file_paths)
+    if not file_paths:
+        return []
+    with ThreadPoolExecutor(max_workers=workers or min(4, len(file_paths))) as pool:
+        results = list(pool.map(lambda path: prepare_image(path, max_side), file_paths))
+
+    kept = {}
+    for result in results:
+        if result.image is None:
+            continue
+        original = kept.get(result.image.fingerprint)
+        if original is not None:
+            result.duplicate_of = original.name
+            result.image = None
+        else:
+            kept[result.image.fingerprint] = result.image
+    return results
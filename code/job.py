@@ -0,0 +1,611 @@
+"""A processing run over one input directory, shared by the GUI and the command line.
+
+Nothing here imports tkinter: front-ends pass on_status/on_progress callbacks;
+on_progress receives a progress.ProgressSnapshot (counts, rates, ETA).
+"""
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ollama_client import OllamaError, OllamaConnectionError
+from fichas import (Summarizer, GenerationAborted, FichaResult, generate_image_ficha, write_ficha, server_parallel_slots,
+                    ficha_filename, COMBINED_FICHA, IMAGES_FICHA, IMAGE_NOTES_PROMPT)
+from cache import ResponseCache
+from manifest import Manifest
+from extraction import iter_extracted, default_workers, default_pdf_pages, open_cache, is_image
+from pdf_backends import default_pdf_backend
+from images import prepare_images, batch_images, default_images_per_request, default_image_concurrency
+from pipeline import DocumentPipeline
+from document import DocumentStore
+from progress import ProgressTracker
+from warmup import ModelWarmup
+from backends import BackendPool, backend_kind
+
+# Default prompt text from the original script
+DEFAULT_PROMPT = "VOCE É UM REVISOR DE BIBLIOGRAFIA QUE PROCESSA TEXTOS CIENTÍFICOS EN INGLÉS E CRIE FICHAS BIBLIOGRÁFICAS EM PORTUGES. Tarefa: Leia o texto seguinte e crie um documento de resumo após ler cada um com as seguintes informações em português: Título; Autores; DOI (se houver); Citação conforme ABNT; Objetivo do artigo; Principais resultados e conclusões; Referência utilizada mais importante (se houver); LEMBRE-SE: EM PORTUGUÊS."
+
+DEFAULT_MODEL = "hf.co/bartowski/OpenGVLab_InternVL3_5-8B-GGUF:Q4_K_M"
+
+# Longest wait of a front-end about to exit for a model load still in progress, so it can be unloaded
+MODEL_RELEASE_SECONDS = 120
+
+
+def default_model(fallback=None, kind=None):
+    """Model from STAGIARIA_MODEL, else OPENAI_MODEL for the openai backend, else fallback,
+    else the one the README recommends"""
+    if os.environ.get("STAGIARIA_MODEL"):
+        return os.environ["STAGIARIA_MODEL"]
+    if (kind or backend_kind()) == "openai" and os.environ.get("OPENAI_MODEL"):
+        return os.environ["OPENAI_MODEL"]
+    return fallback or DEFAULT_MODEL
+
+
+class JobCancelled(Exception):
+    """The run was stopped with ProcessingJob.stop()"""
+
+
+class JobSummary:
+    """What a run did, in a form that serializes to JSON"""
+
+    def __init__(self, input_dir, output_dir, model, per_document):
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.model = model
+        self.mode = "per-document" if per_document else "combined"
+        self.files = 0
+        self.images = 0
+        self.images_attached = 0
+        self.image_requests = 0
+        self.image_duplicates = []
+        self.extracted = 0
+        self.extraction_cached = 0
+        self.skipped = []
+        self.extraction_errors = []
+        self.unchanged = 0
+        self.resumed = 0
+        self.pruned = 0
+        self.fichas = []
+        self.fichas_cached = 0
+        self.ficha_errors = []
+        self.tokens_generated = 0
+        self._ttfts = []
+        self._decode_seconds = 0.0
+        self.error = None
+        self.elapsed_seconds = 0.0
+        # Model warm-up: seconds to load it, and whether /api/ps showed it in memory
+        self.model_load_seconds = None
+        self.model_resident = None
+        # Final state of the adaptive LLM concurrency limit (concurrency.AdaptiveLimiter)
+        self.concurrency = None
+        # Requests and failures per server when several are configured (backends.BackendPool)
+        self.backends = None
+        # Final ProgressSnapshot: per-stage throughput of the run
+        self.progress = None
+
+    def add_stats(self, stats):
+        """Account for the GenerationStats of one generated ficha"""
+        if stats is None:
+            return
+        self.tokens_generated += stats.tokens
+        if stats.ttft is not None:
+            self._ttfts.append(stats.ttft)
+        if stats.tokens_per_second:
+            self._decode_seconds += stats.tokens / stats.tokens_per_second
+
+    @property
+    def ok(self):
+        return self.error is None and not self.extraction_errors and not self.ficha_errors
+
+    def to_dict(self):
+        return {
+            "status": "ok" if self.ok else "failed",
+            "error": self.error,
+            "input_dir": self.input_dir,
+            "output_dir": self.output_dir,
+            "model": self.model,
+            "mode": self.mode,
+            "files": self.files,
+            "images": self.images,
+            "images_attached": self.images_attached,
+            "image_requests": self.image_requests,
+            "image_duplicates": [{"file": name, "duplicate_of": original} for name, original in self.image_duplicates],
+            "extracted": self.extracted,
+            "extraction_cached": self.extraction_cached,
+            "skipped": [{"file": name, "reason": reason} for name, reason in self.skipped],
+            "extraction_errors": [{"file": name, "error": error} for name, error in self.extraction_errors],
+            "unchanged": self.unchanged,
+            "resumed": self.resumed,
+            "pruned": self.pruned,
+            "fichas": self.fichas,
+            "fichas_cached": self.fichas_cached,
+            "ficha_errors": [{"file": name, "error": error} for name, error in self.ficha_errors],
+            "tokens_generated": self.tokens_generated,
+            "time_to_first_token_avg": round(sum(self._ttfts) / len(self._ttfts), 3) if self._ttfts else None,
+            "tokens_per_second": round(self.tokens_generated / self._decode_seconds, 2) if self._decode_seconds else None,
+            "model_load_seconds": round(self.model_load_seconds, 3) if self.model_load_seconds is not None else None,
+            "model_resident": self.model_resident,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "throughput": self.progress.to_dict() if self.progress else None,
+            "concurrency": self.concurrency,
+            "backends": self.backends,
+        }
+
+
+class TokenMeter:
+    """Reports streaming progress of fichas being generated, at most once per interval per ficha"""
+
+    def __init__(self, on_status, interval=0.5):
+        self.on_status = on_status
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._streams = {}
+
+    def add(self, name, piece):
+        now = time.time()
+        with self._lock:
+            started, pieces, last = self._streams.get(name, (now, 0, 0.0))
+            pieces += 1
+            report = now - last >= self.interval
+            self._streams[name] = (started, pieces, now if report else last)
+        if report:
+            elapsed = now - started
+            rate = f", {pieces / elapsed:.1f} tok/s" if elapsed > 0 else ""
+            self.on_status(f"{name}: {pieces} tokens{rate}")
+
+    def finish(self, name):
+        with self._lock:
+            self._streams.pop(name, None)
+
+
+class ProcessingJob:
+    """Extract every file of an input directory and write its fichas to the output directory"""
+
+    def __init__(self, client, model, prompt_text=DEFAULT_PROMPT, per_document=True, incremental=True,
+                 reuse_responses=True, extraction_cache=True, cache_dir=None, keep_sources=False, memory_budget=None,
+                 pdf_pages=None, pdf_backend=None, image_max_side=None, images_per_request=None, image_concurrency=None,
+                 merge_images=False, extraction_workers=None, max_in_flight=None, max_concurrency=None, options=None,
+                 keep_loaded=False, on_status=None, on_progress=None):
+        self.client = client
+        self.model = model
+        self.prompt_text = prompt_text
+        self.per_document = per_document
+        self.incremental = incremental
+        self.reuse_responses = reuse_responses
+        self.extraction_cache = open_cache(cache_dir) if extraction_cache else None
+        self.cache_dir = cache_dir
+        # Write the extracted text to <output_dir>/sources as <name>_source.txt
+        self.keep_sources = keep_sources
+        # Bytes (UTF-8) of extracted text held in memory before spilling to a temporary file
+        self.memory_budget = memory_budget
+        # Only the first and last pdf_pages pages of each PDF go to the model (STAGIARIA_PDF_PAGES)
+        self.pdf_pages = pdf_pages or default_pdf_pages()
+        # PDF library (see pdf_backends; STAGIARIA_PDF_BACKEND, else the fastest installed)
+        self.pdf_backend = pdf_backend or default_pdf_backend()
+        # Longest side of the images sent to the model (STAGIARIA_IMAGE_MAX_SIDE)
+        self.image_max_side = image_max_side
+        # Images sent together in one request, and image requests in flight (STAGIARIA_IMAGES_PER_REQUEST,
+        # STAGIARIA_IMAGE_CONCURRENCY): bounds the memory the server's vision encoder needs
+        self.images_per_request = images_per_request or default_images_per_request()
+        self.image_concurrency = image_concurrency or default_image_concurrency()
+        # Per-document mode: also join the image fichas into fichas/images_ficha.txt
+        self.merge_images = merge_images
+        self.extraction_workers = extraction_workers or default_workers()
+        self.max_in_flight = max_in_flight or server_parallel_slots()
+        # LLM requests in flight start at max_in_flight and adapt up to max_concurrency
+        # (STAGIARIA_MAX_CONCURRENCY, default twice max_in_flight; equal to max_in_flight for a fixed number)
+        self.max_concurrency = max_concurrency
+        # Ollama generation options (e.g. num_predict to cap runaway generations)
+        self.options = options
+        # Leave the model in the server's memory after the run instead of unloading it
+        self.keep_loaded = keep_loaded
+        self._summarizer = None
+        self._warmup = None
+        self._stop_requested = False
+        self._pause_requested = False
+        self.on_status = on_status
+        self.on_progress = on_progress
+        # Summary and progress of the current (or last) run, also available when run() raised
+        self.summary = None
+        self.tracker = None
+
+    def stop(self):
+        """Cancel the run: generations in progress are aborted and run() raises JobCancelled.
+
+        In per-document mode the fichas finished so far are kept in the
+        manifest, and the next run of the same directory resumes from there.
+        """
+        self._stop_requested = True
+        if self._summarizer is not None:
+            self._summarizer.stop()
+
+    def pause(self):
+        """Hold new LLM requests and extraction; requests in flight finish"""
+        self._pause_requested = True
+        if self._summarizer is not None:
+            self._summarizer.pause()
+
+    def resume(self):
+        self._pause_requested = False
+        if self._summarizer is not None:
+            self._summarizer.resume()
+
+    def wait_for_model_release(self, timeout=None):
+        """Wait up to timeout seconds for the unload run() left to the warm-up thread; False on timeout.
+
+        When no request was sent, run() returns without waiting for a model
+        load still in progress. A front-end about to exit calls this, or the
+        unload that follows the load would never be sent.
+        """
+        if self._warmup is None:
+            return True
+        return self._warmup.join(timeout)
+
+    @property
+    def cancelled(self):
+        return self._stop_requested
+
+    def status(self, message):
+        if self.on_status:
+            self.on_status(message)
+
+    def run(self, input_dir, output_dir):
+        """Process input_dir into output_dir and return a JobSummary.
+
+        Per-file extraction and ficha failures are recorded in the summary;
+        a failure of the whole run (Ollama not reachable, unreadable input
+        directory...) raises, with the error also kept in self.summary.
+        """
+        self.summary = summary = JobSummary(input_dir, output_dir, self.model, self.per_document)
+        self.tracker = tracker = ProgressTracker(self.on_progress)
+        started = time.time()
+        response_cache = None
+        summarizer = None
+        store = None
+        # Started once there is LLM work: the model loads while the first files are extracted,
+        # not in front of the first request
+        self._warmup = warmup = ModelWarmup(self.client, self.model, on_status=self.status)
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            # Extracted text is kept in memory; nothing is written next to the fichas unless asked
+            sources_dir = os.path.join(output_dir, "sources") if self.keep_sources else None
+            store = DocumentStore(self.memory_budget, sources_dir)
+
+            # Get all files in input directory
+            files = [f for f in os.listdir(input_dir)
+                     if os.path.isfile(os.path.join(input_dir, f))]
+
+            summary.files = len(files)
+
+            def on_extracted(result):
+                if result.skipped:
+                    summary.skipped.append((result.filename, result.skipped))
+                    self.status(f"Skipping {result.filename} - {result.skipped}")
+                elif result.error:
+                    summary.extraction_errors.append((result.filename, result.error))
+                    self.status(f"Could not extract {result.filename}")
+                else:
+                    summary.extracted += 1
+                    if result.cached:
+                        summary.extraction_cached += 1
+                        self.status(f"Extracted {result.filename} (cached)")
+                    else:
+                        self.status(f"Extracted {result.filename}")
+                # In per-document mode a file that was not extracted gets no ficha
+                tracker.file_done(result.pages, dropped=self.per_document and not result.ok)
+
+            # Collect image paths for multimodal processing; everything else is extracted
+            image_paths = [os.path.join(input_dir, f) for f in files if is_image(f)]
+            document_paths = [os.path.join(input_dir, f) for f in files if not is_image(f)]
+            summary.images = len(image_paths)
+
+            response_cache = ResponseCache(self.cache_dir, read=self.reuse_responses)
+            # Splits documents too long for the model's context and summarizes the parts in parallel
+            self._summarizer = summarizer = Summarizer(self.client, self.model, self.prompt_text, response_cache,
+                                                       self.max_in_flight, options=self.options,
+                                                       on_tokens=tracker.add_tokens,
+                                                       max_concurrency=self.max_concurrency)
+            if self._pause_requested:
+                summarizer.pause()
+            if self._stop_requested:
+                summarizer.stop()
+
+            if self.per_document:
+                manifest = Manifest(output_dir)
+                all_image_paths = image_paths
+                if self.incremental:
+                    # Drop fichas of deleted inputs
+                    summary.pruned = len(manifest.prune(input_dir, document_paths + image_paths))
+                # Documents and images go through the manifest alike; a document ficha must have its current name
+                document_paths = self.select_inputs(manifest, document_paths, summary, ficha_filename)
+                image_paths = self.select_inputs(manifest, image_paths, summary)
+                # Images get their own fichas, a few images per request
+                duplicates = []
+                batches = batch_images(self.prepare_images(image_paths, summary, duplicates), self.images_per_request)
+                # Progress counts the work of this run only
+                tracker.set_totals(files=len(document_paths), fichas=len(document_paths) + len(batches))
+                if document_paths or batches:
+                    warmup.start()
+
+                manifest.begin_run(document_paths + image_paths)
+                try:
+                    # Fichas are generated while the remaining files are still being extracted
+                    self.process_documents(summarizer, document_paths, store, output_dir, on_extracted, manifest,
+                                           summary)
+                    if batches:
+                        self.process_images(summarizer, batches, duplicates, output_dir, manifest, summary)
+                finally:
+                    manifest.save()
+                if self.merge_images and all_image_paths:
+                    self.merge_image_fichas(manifest, all_image_paths, output_dir, summary)
+                manifest.end_run()
+            else:
+                tracker.set_totals(files=len(document_paths), fichas=1)
+                if document_paths or image_paths:
+                    warmup.start()
+                # The combined ficha needs every document, so extract them all first
+                self.status(f"Extracting {len(document_paths)} files ({self.extraction_workers} workers)...")
+                documents = []
+                for result in iter_extracted(document_paths, self.extraction_workers, cache=self.extraction_cache,
+                                             pdf_pages=self.pdf_pages, pdf_backend=self.pdf_backend):
+                    if self._stop_requested:
+                        raise GenerationAborted("Generation stopped")
+                    on_extracted(result)
+                    if result.ok:
+                        store.add(result.document)
+                        documents.append(result.document)
+                images = self.prepare_images(image_paths, summary)
+                self.process_combined(summarizer, documents, output_dir, images, summary)
+
+            return summary
+
+        except GenerationAborted:
+            summary.error = "Cancelled"
+            raise JobCancelled("Cancelled")
+        except Exception as e:
+            summary.error = str(e)
+            raise
+        finally:
+            if summarizer is not None:
+                summarizer.close()
+                summary.concurrency = summarizer.limiter.to_dict()
+            if response_cache is not None:
+                response_cache.close()
+            if store is not None:
+                store.close()
+            # Nothing was asked of the model (early failure, cached fichas): don't wait for its load
+            warmup.release(unload=not self.keep_loaded,
+                           wait=summarizer is not None and summarizer.requests_sent)
+            summary.model_load_seconds = warmup.load_seconds
+            summary.model_resident = warmup.resident
+            if isinstance(self.client, BackendPool):
+                summary.backends = self.client.stats()
+            summary.elapsed_seconds = time.time() - started
+            summary.progress = tracker.snapshot()
+
+    def select_inputs(self, manifest, file_paths, summary, ficha_name=None):
+        """Those of file_paths this run summarizes; the others count as unchanged or resumed"""
+        if self.incremental:
+            # Skip inputs summarized before
+            to_process, unchanged = manifest.select_changed(file_paths, self.model, self.prompt_text,
+                                                            ficha_name=ficha_name)
+            # The last run was interrupted: what it did not finish is redone even if it looks unchanged
+            unfinished = set(manifest.unfinished(unchanged))
+            if unfinished:
+                self.status(f"Resuming interrupted run: {len(unfinished)} files left to do")
+            summary.unchanged += len(unchanged) - len(unfinished)
+            selected = unfinished.union(to_process)
+            return [path for path in file_paths if path in selected]
+        if manifest.run_started is not None:
+            # The last run was interrupted: keep the fichas it finished
+            to_process, resumed = manifest.select_changed(file_paths, self.model, self.prompt_text,
+                                                          since=manifest.run_started, ficha_name=ficha_name)
+            summary.resumed += len(resumed)
+            if resumed:
+                self.status(f"Resuming interrupted run: {len(resumed)} files already done")
+            return to_process
+        return file_paths
+
+    def prepare_images(self, image_paths, summary, duplicates=None):
+        """Shrink the images and drop the unusable and duplicate ones; returns the PreparedImages to send.
+
+        duplicates, if given, collects (file_path, name of the image it repeats).
+        """
+        if not image_paths:
+            return []
+        self.status(f"Preparing {len(image_paths)} images...")
+        images = []
+        for result in prepare_images(image_paths, self.image_max_side):
+            if result.skipped:
+                summary.skipped.append((result.filename, result.skipped))
+                self.status(f"Skipping {result.filename} - {result.skipped}")
+            elif result.error:
+                summary.extraction_errors.append((result.filename, result.error))
+                self.status(f"Could not read {result.filename}")
+            elif result.duplicate_of:
+                summary.image_duplicates.append((result.filename, result.duplicate_of))
+                if duplicates is not None:
+                    duplicates.append((result.file_path, result.duplicate_of))
+                self.status(f"Skipping {result.filename} - same image as {result.duplicate_of}")
+            else:
+                images.append(result.image)
+        summary.images_attached = len(images)
+        return images
+
+    def process_combined(self, summarizer, documents, output_dir, images, summary):
+        """Process all extracted documents (and images) together into combined_ficha.txt"""
+        try:
+            fichas_dir = os.path.join(output_dir, "fichas")
+            os.makedirs(fichas_dir, exist_ok=True)
+
+            # Collect all text content, in input order
+            combined_text = "\n\n".join(document.text for document in documents)
+
+            if len(images) > self.images_per_request:
+                # Too many images for one request: read them a batch at a time and pass on the notes
+                notes = self.describe_images(summarizer, batch_images(images, self.images_per_request), summary)
+                combined_text = "\n\n".join(part for part in [combined_text] + notes if part)
+                images = []
+                self.status("Processing with LLM (text and image notes)...")
+            elif images:
+                summary.image_requests = 1
+                self.status(f"Processing with LLM (multimodal, {len(images)} images)...")
+            else:
+                self.status("Processing text files only with LLM...")
+
+            # Save the combined ficha output, streamed into a part file as it is generated
+            output_path = os.path.join(fichas_dir, COMBINED_FICHA)
+            meter = TokenMeter(self.status)
+
+            def produce(write):
+                def write_piece(piece):
+                    write(piece)
+                    meter.add(COMBINED_FICHA, piece)
+
+                return summarizer.summarize(combined_text, write_piece, images)
+
+            _, cached, stats = write_ficha(output_path, produce)
+
+            summary.fichas.append(output_path)
+            summary.fichas_cached += int(cached)
+            self.tracker.ficha_done()
+            summary.add_stats(stats)
+            if stats:
+                self.status(f"{COMBINED_FICHA}: {stats.describe()}")
+
+        except GenerationAborted:
+            raise
+        except OllamaConnectionError:
+            raise Exception(self.client.not_running_message)
+        except OllamaError as e:
+            raise Exception(f"Error processing with LLM: {e}")
+        except UnicodeEncodeError as ue:
+            raise Exception(f"Encoding error processing with LLM: {ue}. The content may contain unsupported characters.")
+        except Exception as e:
+            raise Exception(f"Unexpected error during LLM processing: {e}")
+
+    def _map_images(self, function, batches):
+        """function(batch) for every batch, at most image_concurrency at a time; results in batch order"""
+        self.summary.image_requests += len(batches)
+        workers = max(1, min(self.image_concurrency, self.max_in_flight, len(batches)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(function, batches))
+
+    def describe_images(self, summarizer, batches, summary):
+        """Notes on each batch of images, for the combined ficha"""
+        instruction = IMAGE_NOTES_PROMPT.format(prompt=self.prompt_text)
+        self.status(f"Reading {summary.images_attached} images in {len(batches)} requests "
+                    f"({self.image_concurrency} at a time)...")
+
+        def describe(batch):
+            text, _, stats = summarizer.ask(instruction, "", images=batch)
+            summary.add_stats(stats)
+            names = ", ".join(image.name for image in batch)
+            return f"[{names}]\n{text}"
+
+        return self._map_images(describe, batches)
+
+    def process_images(self, summarizer, batches, duplicates, output_dir, manifest, summary):
+        """One _ficha.txt per image (or batch of images_per_request images), image_concurrency requests at a time.
+
+        Each image is recorded in the manifest with its batch's ficha, and so
+        is each of the duplicates (file_path, name of the image it repeats).
+        """
+        fichas_dir = os.path.join(output_dir, "fichas")
+        os.makedirs(fichas_dir, exist_ok=True)
+        meter = TokenMeter(self.status)
+        self.status(f"Processing {summary.images_attached} images in {len(batches)} requests "
+                    f"({self.image_concurrency} at a time)...")
+
+        def process(batch):
+            try:
+                result = generate_image_ficha(summarizer, batch, fichas_dir, meter.add)
+            except Exception as e:
+                result = FichaResult(", ".join(image.name for image in batch), error=e, file_path=batch[0].file_path)
+            meter.finish(result.name)
+            if isinstance(result.error, GenerationAborted):
+                return result
+            if result.error is None:
+                for image in batch:
+                    manifest.record(image.file_path, None, result.ficha_path, self.model, self.prompt_text)
+                summary.fichas.append(result.ficha_path)
+                summary.fichas_cached += int(result.cached)
+                summary.add_stats(result.stats)
+                self.status(f"Image ficha: {result.name}" + (" (cached)" if result.cached else ""))
+            else:
+                summary.ficha_errors.append((result.name, str(result.error)))
+            self.tracker.ficha_done()
+            return result
+
+        results = self._map_images(process, batches)
+        fichas = {image.name: result.ficha_path for batch, result in zip(batches, results) if result.error is None
+                  for image in batch}
+        for file_path, original in duplicates:
+            if original in fichas:
+                manifest.record(file_path, None, fichas[original], self.model, self.prompt_text)
+        if self._stop_requested:
+            raise GenerationAborted("Generation stopped")
+        if any(isinstance(result.error, OllamaConnectionError) for result in results):
+            raise Exception(self.client.not_running_message)
+
+    def merge_image_fichas(self, manifest, image_paths, output_dir, summary):
+        """Join the fichas of image_paths (made by this run or an earlier one), in input order, into images_ficha.txt"""
+        names = {}
+        for file_path in image_paths:
+            ficha = manifest.ficha_of(file_path)
+            if ficha is not None:
+                names.setdefault(ficha, []).append(os.path.basename(file_path))
+        output_path = os.path.join(output_dir, "fichas", IMAGES_FICHA)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8', errors='replace') as out:
+            for ficha, batch_names in names.items():
+                try:
+                    with open(os.path.join(output_dir, ficha), 'r', encoding='utf-8', errors='replace') as f:
+                        text = f.read().strip()
+                except OSError:
+                    continue
+                out.write(f"=== {', '.join(batch_names)} ===\n{text}\n\n")
+        summary.fichas.append(output_path)
+        self.status(f"Merged {len(names)} image fichas into {IMAGES_FICHA}")
+
+    def process_documents(self, summarizer, document_paths, store, output_dir, on_extracted, manifest, summary):
+        """Extract documents and create one _ficha.txt per document, both stages overlapping"""
+        fichas_dir = os.path.join(output_dir, "fichas")
+        total = len(document_paths)
+        done = [0]
+
+        meter = TokenMeter(self.status)
+
+        def on_ficha(result):
+            if isinstance(result.error, GenerationAborted):
+                # Cancelled: neither done nor failed, the next run picks it up
+                return
+            if result.error is None:
+                manifest.record(result.file_path, result.file_hash, result.ficha_path, self.model, self.prompt_text)
+                summary.fichas.append(result.ficha_path)
+                summary.fichas_cached += int(result.cached)
+                summary.add_stats(result.stats)
+            else:
+                summary.ficha_errors.append((result.name, str(result.error)))
+            meter.finish(result.name)
+            self.tracker.ficha_done()
+            done[0] += 1
+            if result.cached:
+                detail = " (cached)"
+            elif result.stats:
+                detail = f" ({result.stats.describe()})"
+            else:
+                detail = ""
+            self.status(f"Fichas: {done[0]}/{total} ({result.name}){detail}")
+
+        self.status(f"Processing {total} documents ({self.extraction_workers} extraction workers, "
+                    f"{summarizer.limiter.limit} LLM requests in parallel, adapting up to "
+                    f"{summarizer.limiter.maximum})...")
+        pipeline = DocumentPipeline(summarizer, self.extraction_workers, extraction_cache=self.extraction_cache,
+                                    pdf_pages=self.pdf_pages, pdf_backend=self.pdf_backend)
+        _, results = pipeline.run(document_paths, fichas_dir, store, on_extracted, on_ficha, meter.add)
+
+        if self._stop_requested:
+            raise GenerationAborted("Generation stopped")
+        if any(isinstance(result.error, OllamaConnectionError) for result in results):
+            raise Exception(self.client.not_running_message)
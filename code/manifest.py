@@ -0,0 +1,218 @@
+"""Record of processed inputs kept in the output directory, for incremental runs."""
+import os
+import json
+import time
+import threading
+
+from cache import file_sha256, text_sha256, atomic_write_text
+
+MANIFEST_FILENAME = "stagiaria_manifest.json"
+JOURNAL_FILENAME = "stagiaria_manifest.journal"
+MANIFEST_VERSION = 1
+
+
+class Manifest:
+    """Maps each input file (absolute path) to its size, mtime, hash and the ficha it produced.
+
+    An input is considered unchanged when its content and the model/prompt
+    used are the same as last time and its ficha still exists under its
+    current name. Several inputs may share a ficha (a batch of images): it
+    is redone, or deleted, as a whole when one of them changes or goes away.
+
+    Each record() is also appended (and fsync'ed) to a journal next to the
+    manifest, replayed on load, so documents finished before a crash or a
+    cancel are not summarized again. The manifest also remembers when the
+    current run started, and the files it has to summarize, until end_run():
+    a run that never ended can be resumed.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, MANIFEST_FILENAME)
+        self.journal_path = os.path.join(output_dir, JOURNAL_FILENAME)
+        self.entries = {}
+        # Start time of a run that has not ended (interrupted, or in progress)
+        self.run_started = None
+        # Absolute paths of the files that run was to summarize
+        self.run_pending = set()
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        if data.get("version") == MANIFEST_VERSION:
+            self.entries = data.get("files", {})
+            self.run_started = data.get("run_started")
+            self.run_pending = set(data.get("run_pending", []))
+        self._replay_journal()
+
+    def _replay_journal(self):
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Last line cut short by the crash
+                        continue
+                    self.entries[record.pop("path")] = record
+        except OSError:
+            pass
+
+    def save(self):
+        with self._lock:
+            data = {"version": MANIFEST_VERSION, "files": self.entries}
+            if self.run_started is not None:
+                data["run_started"] = self.run_started
+                data["run_pending"] = sorted(self.run_pending)
+            text = json.dumps(data, ensure_ascii=False, indent=1, sort_keys=True)
+            atomic_write_text(self.path, text)
+            # Everything journaled is in the manifest now
+            try:
+                os.remove(self.journal_path)
+            except OSError:
+                pass
+
+    def begin_run(self, file_paths=()):
+        """Mark a run over file_paths as started (keeping the start and files of an interrupted run being resumed)"""
+        if self.run_started is None:
+            self.run_started = time.time()
+            self.run_pending = set()
+        self.run_pending.update(os.path.abspath(file_path) for file_path in file_paths)
+        self.save()
+
+    def end_run(self):
+        self.run_started = None
+        self.run_pending = set()
+        self.save()
+
+    def unfinished(self, file_paths):
+        """Those of file_paths an interrupted run had to summarize but did not finish"""
+        if self.run_started is None:
+            return []
+        unfinished = []
+        for file_path in file_paths:
+            key = os.path.abspath(file_path)
+            with self._lock:
+                entry = self.entries.get(key, {})
+            if key in self.run_pending and entry.get("updated", 0) < self.run_started:
+                unfinished.append(file_path)
+        return unfinished
+
+    def _ficha_exists(self, entry):
+        """The recorded ficha is still there and not empty"""
+        ficha = entry.get("ficha")
+        if not ficha:
+            return False
+        path = os.path.join(self.output_dir, ficha)
+        return os.path.isfile(path) and os.path.getsize(path) > 0
+
+    def ficha_of(self, file_path):
+        """Ficha recorded for file_path (relative to the output directory), or None"""
+        with self._lock:
+            return self.entries.get(os.path.abspath(file_path), {}).get("ficha")
+
+    def is_unchanged(self, file_path, model, prompt_text, ficha_name=None):
+        """True if file_path was already summarized as-is with this model and prompt.
+
+        With ficha_name (a function of the file name), the ficha must also have the name it gives.
+        """
+        key = os.path.abspath(file_path)
+        with self._lock:
+            entry = self.entries.get(key)
+        if not entry or not self._ficha_exists(entry):
+            return False
+        if ficha_name and os.path.basename(entry["ficha"]) != ficha_name(os.path.basename(file_path)):
+            return False
+        if entry.get("model") != model or entry.get("prompt_sha256") != text_sha256(prompt_text):
+            return False
+
+        stat = os.stat(file_path)
+        if entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime:
+            return True
+        # Touched but possibly identical (copied, re-synced): compare content
+        if entry.get("size") != stat.st_size or file_sha256(file_path) != entry.get("sha256"):
+            return False
+        with self._lock:
+            entry["mtime"] = stat.st_mtime
+        return True
+
+    def record(self, file_path, file_hash, ficha_path, model, prompt_text):
+        """Remember that file_path (with content hash file_hash) produced ficha_path"""
+        stat = os.stat(file_path)
+        entry = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "sha256": file_hash or file_sha256(file_path),
+            "ficha": os.path.relpath(ficha_path, self.output_dir),
+            "model": model,
+            "prompt_sha256": text_sha256(prompt_text),
+            "updated": time.time(),
+        }
+        key = os.path.abspath(file_path)
+        line = json.dumps(dict(entry, path=key), ensure_ascii=False)
+        with self._lock:
+            previous = self.entries.get(key, {}).get("ficha")
+            self.entries[key] = entry
+            if previous and previous != entry["ficha"]:
+                self._remove_unused_ficha(previous)
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def prune(self, input_dir, current_paths):
+        """Forget inputs of input_dir that no longer exist and delete their fichas; returns their paths.
+
+        Inputs that shared a deleted ficha are forgotten too, so they are summarized again.
+        """
+        input_dir = os.path.abspath(input_dir)
+        current = {os.path.abspath(path) for path in current_paths}
+        removed = []
+        with self._lock:
+            for key in list(self.entries):
+                if os.path.dirname(key) != input_dir or key in current:
+                    continue
+                entry = self.entries.pop(key)
+                removed.append(key)
+                ficha = entry.get("ficha")
+                if ficha:
+                    for other in [other for other, value in self.entries.items() if value.get("ficha") == ficha]:
+                        del self.entries[other]
+                    self._remove_unused_ficha(ficha)
+        return removed
+
+    def _remove_unused_ficha(self, ficha):
+        """Delete a ficha no entry refers to any more"""
+        if any(other.get("ficha") == ficha for other in self.entries.values()):
+            return
+        try:
+            os.remove(os.path.join(self.output_dir, ficha))
+        except OSError:
+            pass
+
+    def select_changed(self, file_paths, model, prompt_text, since=None, ficha_name=None):
+        """Split file_paths into (to_process, unchanged), both in input order.
+
+        With since, only fichas written after it count. An unchanged input
+        sharing its ficha with one to process is processed again too.
+        ficha_name is passed to is_unchanged.
+        """
+        changed = set()
+        for file_path in file_paths:
+            if since is not None:
+                with self._lock:
+                    entry = self.entries.get(os.path.abspath(file_path), {})
+                if entry.get("updated", 0) < since:
+                    changed.add(file_path)
+                    continue
+            if not self.is_unchanged(file_path, model, prompt_text, ficha_name):
+                changed.add(file_path)
+        stale = {self.ficha_of(file_path) for file_path in changed} - {None}
+        to_process = [path for path in file_paths if path in changed or self.ficha_of(path) in stale]
+        unchanged = [path for path in file_paths if path not in changed and self.ficha_of(path) not in stale]
+        return to_process, unchanged
@@ -0,0 +1,287 @@
+"""Persistent HTTP client for the local Ollama server.
+
+Talks to the /api/generate and /api/chat endpoints over a small pool of
+keep-alive connections, so processing many documents does not pay for an
+`ollama run` process spawn on every call.
+"""
+import os
+import json
+import queue
+import socket
+import http.client
+from urllib.parse import urlsplit
+
+DEFAULT_HOST = "http://127.0.0.1:11434"
+OLLAMA_PORT = 11434
+
+# How long the server keeps the model loaded after a request (Ollama duration string)
+DEFAULT_KEEP_ALIVE = "30m"
+
+NOT_RUNNING_MESSAGE = "Ollama is not running or not accessible. Please start Ollama server."
+
+
+class OllamaError(Exception):
+    """Error returned by the Ollama server"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class OllamaConnectionError(OllamaError):
+    """The Ollama server could not be reached"""
+
+
+def resolve_host(host=None, default_port=OLLAMA_PORT):
+    """Return (scheme, hostname, port) for the host, honouring OLLAMA_HOST.
+
+    Without a port in host, https uses 443 and http default_port.
+    """
+    host = host or os.environ.get("OLLAMA_HOST") or DEFAULT_HOST
+    if "://" not in host:
+        host = "http://" + host
+    parts = urlsplit(host)
+    scheme = parts.scheme or "http"
+    hostname = parts.hostname or "127.0.0.1"
+    # OLLAMA_HOST=0.0.0.0 means "listen everywhere" on the server side
+    if hostname == "0.0.0.0":
+        hostname = "127.0.0.1"
+    port = parts.port or (443 if scheme == "https" else default_port)
+    return scheme, hostname, port
+
+
+class OllamaClient:
+    """Pooled keep-alive client for the Ollama REST API"""
+
+    # Used in error messages, so they name the server actually configured
+    server_name = "Ollama"
+    not_running_message = NOT_RUNNING_MESSAGE
+    # Port of an http address that does not give one
+    default_port = OLLAMA_PORT
+
+    def __init__(self, host=None, pool_size=4, timeout=600, keep_alive=DEFAULT_KEEP_ALIVE):
+        self.scheme, self.hostname, self.port = resolve_host(host, self.default_port)
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+    @property
+    def base_url(self):
+        return f"{self.scheme}://{self.hostname}:{self.port}"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """Close every idle pooled connection"""
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+
+    def _new_connection(self, timeout=None):
+        timeout = timeout or self.timeout
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.hostname, self.port, timeout=timeout)
+        return http.client.HTTPConnection(self.hostname, self.port, timeout=timeout)
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait(), True
+        except queue.Empty:
+            return self._new_connection(), False
+
+    def _release(self, conn):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def _headers(self):
+        return {"Content-Type": "application/json", "Connection": "keep-alive"}
+
+    def _send(self, method, path, payload):
+        """Send a request and return (connection, response), retrying once on a stale connection"""
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = self._headers()
+
+        for attempt in range(2):
+            conn, reused = self._acquire()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                return conn, conn.getresponse()
+            except (ConnectionRefusedError, socket.gaierror) as e:
+                conn.close()
+                raise OllamaConnectionError(self.not_running_message) from e
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as e:
+                # The server may have dropped an idle keep-alive connection; retry on a fresh one
+                conn.close()
+                if reused and attempt == 0:
+                    continue
+                raise OllamaConnectionError(f"Connection to {self.server_name} lost: {e}") from e
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                raise OllamaConnectionError(f"Cannot reach {self.server_name} at {self.base_url}: {e}") from e
+
+    def _raise_for_status(self, response, raw):
+        if response.status < 400:
+            return
+        try:
+            message = json.loads(raw.decode("utf-8")).get("error", "")
+            if isinstance(message, dict):
+                # OpenAI-compatible servers: {"error": {"message": ...}}
+                message = message.get("message", message)
+        except (ValueError, AttributeError):
+            message = raw.decode("utf-8", errors="replace")
+        raise OllamaError(f"{self.server_name} returned HTTP {response.status}: {message}", status=response.status)
+
+    def request(self, method, path, payload=None):
+        """Perform a non-streaming API call and return the decoded JSON body"""
+        conn, response = self._send(method, path, payload)
+        try:
+            raw = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            raise OllamaConnectionError(f"Connection to {self.server_name} lost: {e}") from e
+
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+
+        self._raise_for_status(response, raw)
+        return json.loads(raw.decode("utf-8")) if raw else {}
+
+    def stream(self, path, payload):
+        """Perform a streaming API call, yielding each decoded JSON line until 'done'.
+
+        Closing the generator early (e.g. to abort a runaway generation)
+        drops the connection, which makes the server stop generating.
+        """
+        conn, response = self._send("POST", path, payload)
+        if response.status >= 400:
+            raw = response.read()
+            conn.close()
+            self._raise_for_status(response, raw)
+
+        finished = False
+        try:
+            while True:
+                line = response.readline()
+                if not line:
+                    # The server went away in the middle of the generation
+                    raise OllamaConnectionError(f"Connection to {self.server_name} lost before the end of the response")
+                line = line.strip()
+                if not line:
+                    continue
+                chunk = self._decode_line(line)
+                if chunk is None:
+                    continue
+                if chunk.get("error"):
+                    raise OllamaError(f"{self.server_name} error: {chunk['error']}")
+                yield chunk
+                if chunk.get("done"):
+                    response.read()
+                    finished = True
+                    break
+        except (OSError, http.client.HTTPException) as e:
+            raise OllamaConnectionError(f"Connection to {self.server_name} lost: {e}") from e
+        finally:
+            if finished and not response.will_close:
+                self._release(conn)
+            else:
+                conn.close()
+
+    def ping(self, timeout=5):
+        """Whether the server answers /api/version within timeout seconds (never raises)"""
+        conn = self._new_connection(timeout)
+        try:
+            conn.request("GET", "/api/version")
+            response = conn.getresponse()
+            response.read()
+            return response.status < 400
+        except (OSError, http.client.HTTPException):
+            return False
+        finally:
+            conn.close()
+
+    def _decode_line(self, line):
+        """One line of a streamed response as a chunk dict, or None for lines without data"""
+        return json.loads(line.decode("utf-8"))
+
+    def _keep_alive(self, keep_alive):
+        return self.keep_alive if keep_alive is None else keep_alive
+
+    def _generate_payload(self, model, prompt, system, images, options, keep_alive, stream):
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": stream,
+            "keep_alive": self._keep_alive(keep_alive),
+        }
+        if system is not None:
+            payload["system"] = system
+        if images:
+            payload["images"] = list(images)
+        if options:
+            payload["options"] = options
+        return payload
+
+    def _chat_payload(self, model, messages, options, keep_alive, stream):
+        payload = {
+            "model": model,
+            "messages": list(messages),
+            "stream": stream,
+            "keep_alive": self._keep_alive(keep_alive),
+        }
+        if options:
+            payload["options"] = options
+        return payload
+
+    def generate(self, model, prompt, system=None, images=None, options=None, keep_alive=None):
+        """Call /api/generate and return the response dict (text in 'response')"""
+        payload = self._generate_payload(model, prompt, system, images, options, keep_alive, False)
+        return self.request("POST", "/api/generate", payload)
+
+    def generate_stream(self, model, prompt, system=None, images=None, options=None, keep_alive=None):
+        """Stream /api/generate, yielding chunks (text pieces in 'response'; the last one has 'done')"""
+        payload = self._generate_payload(model, prompt, system, images, options, keep_alive, True)
+        return self.stream("/api/generate", payload)
+
+    def chat(self, model, messages, options=None, keep_alive=None):
+        """Call /api/chat and return the response dict (text in ['message']['content'])"""
+        payload = self._chat_payload(model, messages, options, keep_alive, False)
+        return self.request("POST", "/api/chat", payload)
+
+    def chat_stream(self, model, messages, options=None, keep_alive=None):
+        """Stream /api/chat, yielding chunks (text pieces in ['message']['content'])"""
+        payload = self._chat_payload(model, messages, options, keep_alive, True)
+        return self.stream("/api/chat", payload)
+
+    def load(self, model, keep_alive=None):
+        """Load the model into memory without generating anything (a /api/generate call with no prompt)"""
+        payload = {"model": model, "stream": False, "keep_alive": self._keep_alive(keep_alive)}
+        return self.request("POST", "/api/generate", payload)
+
+    def unload(self, model):
+        """Ask the server to free the model's memory now (keep_alive 0)"""
+        return self.request("POST", "/api/generate", {"model": model, "stream": False, "keep_alive": 0})
+
+    def running_models(self):
+        """Call /api/ps and return the models currently loaded in memory"""
+        return self.request("GET", "/api/ps").get("models") or []
+
+    def is_loaded(self, model):
+        """Whether the model is resident in the server's memory (None when the server cannot tell)"""
+        names = {model, model if ":" in model else model + ":latest"}
+        return any(entry.get("name") in names or entry.get("model") in names for entry in self.running_models())
+
+    def show(self, model):
+        """Call /api/show and return the model details (parameters, model_info, template...)"""
+        return self.request("POST", "/api/show", {"model": model})
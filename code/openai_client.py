@@ -0,0 +1,170 @@
+"""Client for OpenAI-compatible chat completion servers (LM Studio, llama.cpp server, vLLM...).
+
+It has the OllamaClient interface and returns Ollama-shaped responses
+({"message": {"content": ...}, "eval_count": ...}), so the rest of the code
+does not care which server answers. Connections are pooled and kept alive
+the same way.
+"""
+import os
+import json
+import http.client
+from urllib.parse import urlsplit
+
+from ollama_client import OllamaClient, OllamaError
+
+DEFAULT_BASE_URL = "http://localhost:1234/v1"
+
+NOT_RUNNING_MESSAGE = ("The OpenAI-compatible server is not running or not accessible. "
+                       "Please start it or check OPENAI_BASE_URL.")
+
+# Ollama options with an OpenAI equivalent
+OPTION_NAMES = {
+    "num_predict": "max_tokens",
+    "temperature": "temperature",
+    "top_p": "top_p",
+    "seed": "seed",
+    "stop": "stop",
+}
+
+
+def image_url(encoded):
+    """data: URL for a base64 image (JPEG or PNG, the formats images.py sends)"""
+    mime = "image/png" if encoded.startswith("iVBOR") else "image/jpeg"
+    return f"data:{mime};base64,{encoded}"
+
+
+def openai_messages(messages):
+    """Ollama chat messages (images in an 'images' list) in the OpenAI format (image_url content parts)"""
+    converted = []
+    for message in messages:
+        images = message.get("images")
+        if not images:
+            converted.append({"role": message["role"], "content": message["content"]})
+            continue
+        parts = [{"type": "text", "text": message["content"]}] if message["content"] else []
+        parts += [{"type": "image_url", "image_url": {"url": image_url(encoded)}} for encoded in images]
+        converted.append({"role": message["role"], "content": parts})
+    return converted
+
+
+class OpenAIClient(OllamaClient):
+    """Pooled keep-alive client for the /v1/chat/completions API, streaming with server-sent events.
+
+    Model loading is up to the server: load() and unload() do nothing and
+    is_loaded() cannot tell whether the model is resident (None).
+    """
+
+    server_name = "OpenAI-compatible server"
+    not_running_message = NOT_RUNNING_MESSAGE
+    # A base URL without a port is a plain web address
+    default_port = 80
+
+    def __init__(self, base_url=None, api_key=None, pool_size=4, timeout=600):
+        base_url = base_url or os.environ.get("OPENAI_BASE_URL") or DEFAULT_BASE_URL
+        super().__init__(base_url, pool_size=pool_size, timeout=timeout)
+        if "://" not in base_url:
+            base_url = "http://" + base_url
+        # Path of the API on the server, usually /v1
+        self.prefix = urlsplit(base_url).path.rstrip("/")
+        self.api_key = api_key if api_key is not None else os.environ.get("OPENAI_API_KEY")
+
+    @property
+    def base_url(self):
+        return f"{self.scheme}://{self.hostname}:{self.port}{self.prefix}"
+
+    def _headers(self):
+        headers = super()._headers()
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+
+    def _decode_line(self, line):
+        line = line.decode("utf-8")
+        # Server-sent events: only "data:" lines matter (not comments or event names)
+        if not line.startswith("data:"):
+            return None
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return {"done": True}
+        event = json.loads(data)
+        if event.get("error"):
+            error = event["error"]
+            raise OllamaError(f"Server error: {error.get('message', error) if isinstance(error, dict) else error}")
+        choices = event.get("choices") or [{}]
+        chunk = {"message": {"role": "assistant", "content": (choices[0].get("delta") or {}).get("content") or ""},
+                 "done": False}
+        usage = event.get("usage")
+        if usage:
+            # Sent last, right before [DONE]
+            chunk["done"] = True
+            chunk["eval_count"] = usage.get("completion_tokens")
+        return chunk
+
+    def _chat_payload(self, model, messages, options, keep_alive, stream):
+        payload = {"model": model, "messages": openai_messages(messages), "stream": stream}
+        if stream:
+            # Token counts come in a last chunk; a server ignoring this leaves eval_count unset,
+            # and the counts (and tok/s) fall back to the number of streamed pieces
+            payload["stream_options"] = {"include_usage": True}
+        for name, value in (options or {}).items():
+            if name in OPTION_NAMES:
+                payload[OPTION_NAMES[name]] = value
+        return payload
+
+    def chat(self, model, messages, options=None, keep_alive=None):
+        payload = self._chat_payload(model, messages, options, keep_alive, False)
+        response = self.request("POST", self.prefix + "/chat/completions", payload)
+        choices = response.get("choices") or [{}]
+        return {
+            "message": {"role": "assistant", "content": (choices[0].get("message") or {}).get("content") or ""},
+            "done": True,
+            "eval_count": (response.get("usage") or {}).get("completion_tokens"),
+        }
+
+    def chat_stream(self, model, messages, options=None, keep_alive=None):
+        payload = self._chat_payload(model, messages, options, keep_alive, True)
+        return self.stream(self.prefix + "/chat/completions", payload)
+
+    def generate(self, model, prompt, system=None, images=None, options=None, keep_alive=None):
+        """Single-turn request through chat completions, answered like Ollama's /api/generate"""
+        messages = [{"role": "system", "content": system}] if system is not None else []
+        messages.append({"role": "user", "content": prompt, "images": images})
+        return {"response": self.chat(model, messages, options)["message"]["content"], "done": True}
+
+    def generate_stream(self, model, prompt, system=None, images=None, options=None, keep_alive=None):
+        messages = [{"role": "system", "content": system}] if system is not None else []
+        messages.append({"role": "user", "content": prompt, "images": images})
+        for chunk in self.chat_stream(model, messages, options):
+            chunk["response"] = chunk.pop("message")["content"]
+            yield chunk
+
+    def show(self, model):
+        """No model details in this API: the context length comes from OLLAMA_CONTEXT_LENGTH"""
+        return {}
+
+    def ping(self, timeout=5):
+        conn = self._new_connection(timeout)
+        try:
+            conn.request("GET", self.prefix + "/models", headers=self._headers())
+            response = conn.getresponse()
+            response.read()
+            return response.status < 400
+        except (OSError, http.client.HTTPException):
+            return False
+        finally:
+            conn.close()
+
+    def load(self, model, keep_alive=None):
+        return {}
+
+    def unload(self, model):
+        return {}
+
+    def running_models(self):
+        """Models the server offers (/v1/models), in the /api/ps entry format"""
+        data = self.request("GET", self.prefix + "/models").get("data") or []
+        return [{"name": entry.get("id"), "model": entry.get("id")} for entry in data]
+
+    def is_loaded(self, model):
+        """Unknown: /v1/models lists the models offered, not the ones in memory"""
+        return None
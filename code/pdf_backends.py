@@ -0,0 +1,82 @@
+"""PDF text extraction backends: whichever of PyMuPDF, pypdf, pdfminer.six and PyPDF2 are installed.
+
+Every backend yields (page_number, text) one page at a time. The default is
+the first available in BACKENDS order, or STAGIARIA_PDF_BACKEND; run
+development/benchmark_pdf_backends.py to compare them on your machine.
+"""
+import os
+import importlib
+
+
+def _pymupdf_pages(file_path, numbers):
+    import fitz
+    with fitz.open(file_path) as document:
+        for number in numbers(document.page_count):
+            yield number, document.load_page(number).get_text()
+
+
+def _pypdf_pages(file_path, numbers, module="pypdf"):
+    reader_module = importlib.import_module(module)
+    with open(file_path, 'rb') as file:
+        reader = reader_module.PdfReader(file)
+        for number in numbers(len(reader.pages)):
+            yield number, reader.pages[number].extract_text() or ""
+
+
+def _pdfminer_pages(file_path, numbers):
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LTTextContainer
+    from pdfminer.pdfpage import PDFPage
+    with open(file_path, 'rb') as file:
+        count = sum(1 for _ in PDFPage.get_pages(file))
+    selected = list(numbers(count))
+    # extract_pages yields the selected pages in document order
+    for number, layout in zip(selected, extract_pages(file_path, page_numbers=selected)):
+        yield number, "".join(item.get_text() for item in layout if isinstance(item, LTTextContainer))
+
+
+def _pypdf2_pages(file_path, numbers):
+    return _pypdf_pages(file_path, numbers, module="PyPDF2")
+
+
+# (name, module to import, page iterator), in order of preference
+BACKENDS = [
+    ("pymupdf", "fitz", _pymupdf_pages),
+    ("pypdf", "pypdf", _pypdf_pages),
+    ("pdfminer", "pdfminer.high_level", _pdfminer_pages),
+    ("PyPDF2", "PyPDF2", _pypdf2_pages),
+]
+
+
+def _importable(module):
+    try:
+        importlib.import_module(module)
+        return True
+    except ImportError:
+        return False
+
+
+def available_backends():
+    """Names of the installed backends, in order of preference"""
+    return [name for name, module, _ in BACKENDS if _importable(module)]
+
+
+def default_pdf_backend():
+    """STAGIARIA_PDF_BACKEND if installed, else the first available backend (None if there is none)"""
+    available = available_backends()
+    requested = os.environ.get("STAGIARIA_PDF_BACKEND")
+    if requested in available:
+        return requested
+    return available[0] if available else None
+
+
+def all_pages(count):
+    return range(count)
+
+
+def iter_pages(backend, file_path, numbers=all_pages):
+    """Yield (page_number, text) with the given backend; numbers(page_count) picks the pages to read"""
+    for name, _, pages in BACKENDS:
+        if name == backend:
+            return pages(file_path, numbers)
+    raise Exception(f"Unknown PDF backend: {backend}")
@@ -0,0 +1,111 @@
+"""Streaming pipeline: extraction stage -> bounded queue -> LLM inference stage.
+
+Documents are summarized as soon as they are extracted, so the model server
+starts working seconds after the job starts and the two stages overlap
+instead of running back to back. The queue between them is bounded: when
+inference falls behind, extraction blocks instead of piling up text.
+Extracted text travels in memory (see document.DocumentStore).
+"""
+import os
+import queue
+import threading
+
+from extraction import iter_extracted, default_workers
+from fichas import generate_ficha, FichaResult, GenerationAborted
+from document import DocumentStore
+
+_DONE = object()
+
+
+class DocumentPipeline:
+    """Extract documents and generate one ficha per document, both stages running at once"""
+
+    def __init__(self, summarizer, extraction_workers=None, queue_size=None, extraction_cache=None, pdf_pages=None,
+                 pdf_backend=None):
+        self.summarizer = summarizer
+        self.extraction_workers = extraction_workers or default_workers()
+        # One consumer per request slot; long documents share those slots for their chunks
+        self.max_in_flight = summarizer.max_in_flight
+        # Enough extracted documents to keep every inference slot busy, and no more
+        self.queue_size = queue_size or self.max_in_flight * 2
+        self.extraction_cache = extraction_cache
+        # Read only the first and last pdf_pages pages of PDFs
+        self.pdf_pages = pdf_pages
+        self.pdf_backend = pdf_backend
+
+    def run(self, document_paths, fichas_dir, store=None, on_extracted=None, on_ficha=None, on_text=None):
+        """Process document_paths, returning (extraction_results, ficha_results).
+
+        Extracted documents are added to store (a DocumentStore, by default
+        an in-memory one) and released once their ficha is written.
+        on_extracted(result) is called from the extraction stage for every
+        ExtractionResult; on_ficha(result) from the inference stage with a
+        FichaResult as each ficha completes, and on_text(name, piece) as
+        fichas stream in. Both lists are in completion order and
+        per-document failures never stop the rest of the run.
+        """
+        os.makedirs(fichas_dir, exist_ok=True)
+        own_store = store is None
+        if own_store:
+            store = DocumentStore()
+        work = queue.Queue(maxsize=self.queue_size)
+        extraction_results = []
+        ficha_results = []
+        results_lock = threading.Lock()
+        producer_error = []
+
+        def produce():
+            try:
+                for result in iter_extracted(document_paths, self.extraction_workers,
+                                             cache=self.extraction_cache, pdf_pages=self.pdf_pages,
+                                             pdf_backend=self.pdf_backend):
+                    # Extraction pauses and stops with the summarizer
+                    self.summarizer.wait_while_paused()
+                    extraction_results.append(result)
+                    if on_extracted:
+                        on_extracted(result)
+                    if result.ok:
+                        store.add(result.document)
+                        # Blocks while the inference stage is behind (backpressure)
+                        work.put(result.document)
+            except GenerationAborted:
+                pass
+            except Exception as e:
+                producer_error.append(e)
+            finally:
+                for _ in range(self.max_in_flight):
+                    work.put(_DONE)
+
+        def consume():
+            while True:
+                document = work.get()
+                if document is _DONE:
+                    return
+                try:
+                    if self.summarizer.stop_event.is_set():
+                        # Cancelled: documents still queued are not started
+                        raise GenerationAborted("Generation stopped")
+                    outcome = generate_ficha(self.summarizer, document, fichas_dir, on_text)
+                except Exception as e:
+                    outcome = FichaResult(document.name, error=e,
+                                          file_path=document.file_path, file_hash=document.file_hash)
+                finally:
+                    store.release(document)
+                with results_lock:
+                    ficha_results.append(outcome)
+                if on_ficha:
+                    on_ficha(outcome)
+
+        threads = [threading.Thread(target=produce, name="extract", daemon=True)]
+        threads += [threading.Thread(target=consume, name=f"infer-{i}", daemon=True)
+                    for i in range(self.max_in_flight)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if own_store:
+            store.close()
+
+        if producer_error:
+            raise producer_error[0]
+        return extraction_results, ficha_results
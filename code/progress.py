@@ -0,0 +1,160 @@
+"""Run progress: per-stage counters, throughput and ETA."""
+import time
+import threading
+
+# A stage with work left and no activity for this long is reported as stalled
+STALL_SECONDS = 120
+
+
+def format_duration(seconds):
+    """'1:02:03' / '2:03' style duration"""
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+class ProgressSnapshot:
+    """Consistent copy of the counters at one moment, with derived rates and ETA"""
+
+    def __init__(self, tracker, now):
+        self.elapsed = now - tracker.started
+        self.files_total = tracker.files_total
+        self.files_done = tracker.files_done
+        self.pages = tracker.pages
+        self.fichas_total = tracker.fichas_total
+        self.fichas_done = tracker.fichas_done
+        self.tokens = tracker.tokens
+        self.files_per_second = self._rate(self.files_done)
+        self.pages_per_second = self._rate(self.pages)
+        self.fichas_per_minute = self._rate(self.fichas_done) * 60
+        self.tokens_per_second = self._rate(self.tokens)
+        self.extraction_stalled = self._stalled(now, tracker.last_extraction, self.files_done, self.files_total)
+        self.inference_stalled = self._stalled(now, tracker.last_inference, self.fichas_done, self.fichas_total)
+
+    def _rate(self, count):
+        return count / self.elapsed if self.elapsed > 0 else 0.0
+
+    def _stalled(self, now, last_activity, done, total):
+        return done < total and now - last_activity > STALL_SECONDS
+
+    @property
+    def fraction(self):
+        """Share of the work done, 0.0-1.0 (extracting a file and writing its ficha weigh the same)"""
+        total = self.files_total + self.fichas_total
+        if not total:
+            # Nothing to do (e.g. every file unchanged)
+            return 1.0
+        return min(1.0, (self.files_done + self.fichas_done) / total)
+
+    @property
+    def eta(self):
+        """Seconds left, from the slower of the two (overlapping) stages; None until measurable"""
+        etas = []
+        for done, total in ((self.files_done, self.files_total), (self.fichas_done, self.fichas_total)):
+            if done >= total:
+                continue
+            if not done:
+                return None
+            etas.append((total - done) * self.elapsed / done)
+        return max(etas) if etas else 0.0
+
+    def describe(self):
+        """One-line summary for a status bar or a log"""
+        parts = [
+            f"files {self.files_done}/{self.files_total} ({self.files_per_second:.2f}/s, {self.pages} pages)",
+            f"fichas {self.fichas_done}/{self.fichas_total} ({self.fichas_per_minute:.1f}/min)",
+            f"{self.tokens} tokens ({self.tokens_per_second:.1f}/s)",
+        ]
+        eta = self.eta
+        if eta is not None and self.fraction < 1.0:
+            parts.append(f"ETA {format_duration(eta)}")
+        if self.extraction_stalled:
+            parts.append("extraction stalled")
+        if self.inference_stalled:
+            parts.append("LLM stalled")
+        return " | ".join(parts)
+
+    def to_dict(self):
+        eta = self.eta
+        return {
+            "elapsed_seconds": round(self.elapsed, 3),
+            "files_total": self.files_total,
+            "files_done": self.files_done,
+            "pages": self.pages,
+            "fichas_total": self.fichas_total,
+            "fichas_done": self.fichas_done,
+            "tokens": self.tokens,
+            "files_per_second": round(self.files_per_second, 3),
+            "pages_per_second": round(self.pages_per_second, 3),
+            "fichas_per_minute": round(self.fichas_per_minute, 3),
+            "tokens_per_second": round(self.tokens_per_second, 3),
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+        }
+
+
+class ProgressTracker:
+    """Thread-safe counters updated by the extraction and inference stages.
+
+    on_change(snapshot) is called after every file and ficha, and at most
+    once per token_interval seconds while tokens are being generated.
+    """
+
+    def __init__(self, on_change=None, token_interval=0.5):
+        self.on_change = on_change
+        self.token_interval = token_interval
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.last_extraction = self.last_inference = self.started
+        self._last_token_report = 0.0
+        self.files_total = 0
+        self.files_done = 0
+        self.pages = 0
+        self.fichas_total = 0
+        self.fichas_done = 0
+        self.tokens = 0
+
+    def snapshot(self):
+        with self._lock:
+            return ProgressSnapshot(self, time.time())
+
+    def _changed(self):
+        if self.on_change:
+            self.on_change(self.snapshot())
+
+    def set_totals(self, files=None, fichas=None):
+        with self._lock:
+            if files is not None:
+                self.files_total = files
+            if fichas is not None:
+                self.fichas_total = fichas
+        self._changed()
+
+    def file_done(self, pages=0, dropped=False):
+        """One file left the extraction stage; dropped when it failed or was skipped, so no ficha follows"""
+        with self._lock:
+            self.files_done += 1
+            self.pages += pages
+            if dropped:
+                self.fichas_total -= 1
+            self.last_extraction = time.time()
+        self._changed()
+
+    def ficha_done(self):
+        with self._lock:
+            self.fichas_done += 1
+            self.last_inference = time.time()
+        self._changed()
+
+    def add_tokens(self, count):
+        now = time.time()
+        with self._lock:
+            self.tokens += count
+            self.last_inference = now
+            report = now - self._last_token_report >= self.token_interval
+            if report:
+                self._last_token_report = now
+        if report:
+            self._changed()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""Command-line (headless) entry point: same processing as the GUI, without tkinter.
+
+Example:
+    python stagiaria_cli.py ~/artigos ~/fichas --prompt-file prompt.txt --concurrency 4
+
+Progress goes to stderr; a JSON summary of the run is printed to stdout on exit.
+Exit status is 0 when every file was processed, 2 when the input directory
+or the prompt file cannot be read, 1 otherwise.
+
+Ctrl-C (or SIGTERM) cancels the run after saving what is done; running the
+same command again resumes it. A second Ctrl-C quits at once.
+"""
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+
+from backends import open_client, configured_hosts, backend_kind, BACKEND_KINDS
+from env_file import load_env_file
+from fichas import server_parallel_slots
+from concurrency import default_max_concurrency
+from extraction import default_workers, default_pdf_pages
+from pdf_backends import available_backends, default_pdf_backend
+from images import default_image_max_side, default_images_per_request, default_image_concurrency
+from job import ProcessingJob, JobSummary, JobCancelled, DEFAULT_PROMPT, MODEL_RELEASE_SECONDS, default_model
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Create bibliographic fichas from PDF/Word/text files with a local Ollama model."
+    )
+    parser.add_argument("input_dir", help="directory with the PDF/Word/text/image files")
+    parser.add_argument("output_dir", help="directory where the fichas are written")
+    parser.add_argument("--prompt-file", help="file with the prompt text (default: the built-in Portuguese prompt)")
+    parser.add_argument("--backend", choices=BACKEND_KINDS, default=backend_kind(),
+                        help="server API: Ollama, or any OpenAI-compatible server at $OPENAI_BASE_URL "
+                             "(default: $STAGIARIA_BACKEND or %(default)s)")
+    parser.add_argument("--model",
+                        help="model (default: $STAGIARIA_MODEL, $OPENAI_MODEL with --backend openai, "
+                             f"or {default_model(kind='ollama')})")
+    parser.add_argument("--host", help="Ollama server address, or several separated by commas to spread the requests "
+                                       "over them (default: $STAGIARIA_HOSTS, $OLLAMA_HOST or 127.0.0.1:11434)")
+    parser.add_argument("--concurrency", type=int,
+                        help="LLM requests in flight (default: $OLLAMA_NUM_PARALLEL or "
+                             f"{server_parallel_slots()}, per server)")
+    parser.add_argument("--max-concurrency", type=int,
+                        help="upper bound for the LLM requests in flight, which adapt to the server's throughput "
+                             "and errors (default: $STAGIARIA_MAX_CONCURRENCY or twice --concurrency; "
+                             "equal to --concurrency for a fixed number)")
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="extraction processes (default: $STAGIARIA_EXTRACTION_WORKERS or %(default)s)")
+    parser.add_argument("--max-tokens", type=int,
+                        help="stop each generation after this many tokens (Ollama num_predict)")
+    parser.add_argument("--combined", action="store_true",
+                        help="write a single combined_ficha.txt instead of one ficha per document")
+    parser.add_argument("--full", action="store_true",
+                        help="process every file, not only the new or changed ones")
+    parser.add_argument("--cache-dir", help="cache directory (default: $STAGIARIA_CACHE_DIR or ~/.cache/stagiaria)")
+    parser.add_argument("--no-extraction-cache", action="store_true",
+                        help="always re-extract text from the input files")
+    parser.add_argument("--no-response-cache", action="store_true",
+                        help="regenerate every LLM response (new responses still refresh the cache)")
+    parser.add_argument("--pdf-pages", type=int, default=default_pdf_pages(),
+                        help="read only the first and last N pages of each PDF (title, authors, DOI, references; "
+                             "default: $STAGIARIA_PDF_PAGES or all pages)")
+    parser.add_argument("--pdf-backend", choices=available_backends(), default=default_pdf_backend(),
+                        help="PDF library (default: $STAGIARIA_PDF_BACKEND or the first installed of %(choices)s)")
+    parser.add_argument("--image-max-side", type=int, default=default_image_max_side(),
+                        help="shrink images so their longest side is at most this many pixels "
+                             "(default: $STAGIARIA_IMAGE_MAX_SIDE or %(default)s; needs Pillow)")
+    parser.add_argument("--images-per-request", type=int, default=default_images_per_request(),
+                        help="images sent together in one request "
+                             "(default: $STAGIARIA_IMAGES_PER_REQUEST or %(default)s)")
+    parser.add_argument("--image-concurrency", type=int, default=default_image_concurrency(),
+                        help="image requests in flight (default: $STAGIARIA_IMAGE_CONCURRENCY or %(default)s)")
+    parser.add_argument("--merge-images", action="store_true",
+                        help="also join the image fichas into fichas/images_ficha.txt")
+    parser.add_argument("--keep-sources", action="store_true",
+                        help="also write the extracted text to OUTPUT_DIR/sources as <name>_source.txt")
+    parser.add_argument("--keep-loaded", action="store_true",
+                        help="leave the model in the server's memory when done (default: unload it)")
+    parser.add_argument("--summary-file", help="also write the JSON summary to this file")
+    parser.add_argument("--progress-interval", type=float, default=5.0,
+                        help="seconds between progress lines with throughput and ETA (default: %(default)s)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print progress to stderr")
+    return parser
+
+
+def write_summary(summary, summary_file=None):
+    """Print the JSON summary to stdout, and to summary_file if given"""
+    report = json.dumps(summary.to_dict(), ensure_ascii=False, indent=2)
+    print(report)
+    if summary_file:
+        with open(summary_file, 'w', encoding='utf-8') as f:
+            f.write(report + "\n")
+
+
+def main(argv=None):
+    # .env settings (OPENAI_BASE_URL, STAGIARIA_BACKEND...) count as environment variables
+    load_env_file()
+    args = build_parser().parse_args(argv)
+    model = args.model or default_model(kind=args.backend)
+
+    def fail(error):
+        # Nothing was run, but scripts still get their summary
+        print(error, file=sys.stderr)
+        summary = JobSummary(args.input_dir, args.output_dir, model, not args.combined)
+        summary.error = error
+        write_summary(summary, args.summary_file)
+        return 2
+
+    if not os.path.isdir(args.input_dir):
+        return fail(f"Input directory does not exist: {args.input_dir}")
+
+    prompt_text = DEFAULT_PROMPT
+    if args.prompt_file:
+        try:
+            with open(args.prompt_file, 'r', encoding='utf-8') as f:
+                prompt_text = f.read().strip()
+        except (OSError, UnicodeDecodeError) as e:
+            return fail(f"Cannot read prompt file {args.prompt_file}: {e}")
+
+    def on_status(message):
+        if not args.quiet:
+            print(message, file=sys.stderr, flush=True)
+
+    last_report = [0.0]
+
+    def on_progress(snapshot):
+        now = time.time()
+        if now - last_report[0] >= args.progress_interval:
+            last_report[0] = now
+            on_status(f"[{snapshot.fraction:.0%}] {snapshot.describe()}")
+
+    hosts = configured_hosts(args.host, args.backend)
+    concurrency = args.concurrency or server_parallel_slots() * len(hosts)
+    # A pooled connection for each request the adaptive limit can reach
+    max_concurrency = max(concurrency, args.max_concurrency or default_max_concurrency(concurrency))
+    client = open_client(hosts, pool_size=max_concurrency, kind=args.backend)
+    job = ProcessingJob(
+        client, model, prompt_text,
+        per_document=not args.combined,
+        incremental=not args.full,
+        reuse_responses=not args.no_response_cache,
+        extraction_cache=not args.no_extraction_cache,
+        cache_dir=args.cache_dir,
+        keep_sources=args.keep_sources,
+        pdf_pages=args.pdf_pages,
+        pdf_backend=args.pdf_backend,
+        image_max_side=args.image_max_side,
+        images_per_request=args.images_per_request,
+        image_concurrency=args.image_concurrency,
+        merge_images=args.merge_images,
+        keep_loaded=args.keep_loaded,
+        extraction_workers=args.workers,
+        max_in_flight=concurrency,
+        max_concurrency=max_concurrency,
+        options={"num_predict": args.max_tokens} if args.max_tokens else None,
+        on_status=on_status,
+        on_progress=on_progress
+    )
+
+    def cancel(signum, frame):
+        # Stop the streams in flight so the server stops generating too
+        on_status("Cancelling... (Ctrl-C again to quit now)")
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        job.stop()
+
+    signal.signal(signal.SIGINT, cancel)
+    signal.signal(signal.SIGTERM, cancel)
+    interrupted = False
+    try:
+        summary = job.run(args.input_dir, args.output_dir)
+    except JobCancelled:
+        summary = job.summary
+        on_status("Cancelled: run the same command again to resume")
+    except KeyboardInterrupt:
+        interrupted = True
+        job.stop()
+        summary = job.summary
+        summary.error = "Interrupted"
+    except Exception as e:
+        summary = job.summary
+        on_status(f"Error: {e}")
+    finally:
+        # The model may still be loading when nothing was sent to it: let its unload go out before exiting
+        if not interrupted and not job.wait_for_model_release(MODEL_RELEASE_SECONDS):
+            on_status(f"Model {model} still loading; it stays loaded until the server's keep-alive expires")
+        client.close()
+
+    if summary.progress is not None:
+        on_status(summary.progress.describe())
+    write_summary(summary, args.summary_file)
+    return 0 if summary.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
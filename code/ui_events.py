@@ -0,0 +1,47 @@
+"""Hand-off of GUI updates from worker threads to the Tk main loop.
+
+Tk widgets and variables may only be touched from the thread running
+mainloop(). Worker threads post callbacks here instead, and the GUI drains
+them from a root.after() poll.
+"""
+import queue
+import threading
+
+# Poll period of the Tk thread, about one frame at 60 fps
+POLL_MS = 16
+
+
+class UiEventChannel:
+    """Queue of callbacks to run on the Tk thread.
+
+    put() delivers every event, in order (dialogs, end of run...).
+    update() keeps only the latest event per key, so status and progress
+    churn from the workers costs one widget update per poll at most.
+    Coalesced updates are applied before the queued events of the same poll.
+    """
+
+    def __init__(self):
+        self._events = queue.Queue()
+        self._latest = {}
+        self._lock = threading.Lock()
+
+    def put(self, callback, *args, **kwargs):
+        self._events.put((callback, args, kwargs))
+
+    def update(self, key, callback, *args, **kwargs):
+        with self._lock:
+            self._latest[key] = (callback, args, kwargs)
+
+    def drain(self, max_events=100):
+        """Run pending callbacks (call from the Tk thread); returns how many ran"""
+        with self._lock:
+            pending = list(self._latest.values())
+            self._latest.clear()
+        while len(pending) < max_events:
+            try:
+                pending.append(self._events.get_nowait())
+            except queue.Empty:
+                break
+        for callback, args, kwargs in pending:
+            callback(*args, **kwargs)
+        return len(pending)
@@ -0,0 +1,94 @@
+"""Model warm-up: load the model while files are extracted and keep it resident for the whole job."""
+import time
+import threading
+
+from ollama_client import OllamaError
+
+# Seconds between keep-alive refreshes, well within the client's keep_alive (30 minutes by default)
+REFRESH_SECONDS = 300
+
+
+class ModelWarmup:
+    """Loads the model in a background thread, so the cold start overlaps with extraction.
+
+    After loading it checks (/api/ps) that the model is resident, then
+    refreshes its keep-alive every refresh_interval seconds, so long
+    extraction phases do not let the server unload it. release() stops the
+    refreshes and, with unload, frees the server's memory.
+    """
+
+    def __init__(self, client, model, refresh_interval=REFRESH_SECONDS, on_status=None):
+        self.client = client
+        self.model = model
+        self.refresh_interval = refresh_interval
+        self.on_status = on_status
+        # Filled in once the warm-up finished
+        self.load_seconds = None
+        self.resident = None
+        self.error = None
+        self._loaded = threading.Event()
+        self._stop = threading.Event()
+        self._unload = False
+        self._thread = None
+
+    def status(self, message):
+        if self.on_status:
+            self.on_status(message)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        started = time.time()
+        try:
+            self.client.load(self.model)
+            load_seconds = time.time() - started
+            # None: the server cannot tell (OpenAI-compatible API, which loads models itself)
+            self.resident = self.client.is_loaded(self.model)
+            if self.resident is not None:
+                self.load_seconds = load_seconds
+            if self.resident:
+                self.status(f"Model {self.model} loaded ({self.load_seconds:.1f}s)")
+            elif self.resident is not None:
+                self.status(f"Model {self.model} loaded but not resident; the server may be short of memory")
+        except OllamaError as e:
+            # The generation requests report the problem; warming up is best effort
+            self.error = e
+        finally:
+            self._loaded.set()
+
+        while self.error is None and not self._stop.wait(self.refresh_interval):
+            try:
+                self.client.load(self.model)
+            except OllamaError:
+                pass
+
+        if self._unload and self.error is None:
+            try:
+                self.client.unload(self.model)
+            except OllamaError:
+                pass
+
+    def wait(self, timeout=None):
+        """Block until the model is loaded (or the warm-up failed); False on timeout"""
+        return self._loaded.wait(timeout)
+
+    def release(self, unload=True, wait=True):
+        """Stop keeping the model loaded; with unload the server frees it.
+
+        The unload comes after a load still in progress, so it is not
+        overtaken by it. With wait, release() waits for both; without, it
+        returns at once and the warm-up thread unloads once the load is done.
+        """
+        self._unload = unload
+        self._stop.set()
+        if wait:
+            self.join()
+
+    def join(self, timeout=None):
+        """Wait for the warm-up thread (and the unload it ends with) to finish; False on timeout"""
+        if self._thread is None:
+            return True
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""Compare the installed PDF backends (see code/pdf_backends.py): speed, memory and text fidelity.
+
+Example:
+    python development/benchmark_pdf_backends.py
+    python development/benchmark_pdf_backends.py --pages 300 --repeat 5 ~/artigos/*.pdf
+
+Each backend reads every file in a fresh process, so peak memory is not
+shared between backends. Files are sample_documents/inputs/test_paper.pdf
+plus a synthetic corpus whose text is known, which gives an exact fidelity
+score (share of the words recovered). For real files, fidelity is the word
+agreement with the --reference backend.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:
+    # Windows: no peak memory figures
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "code"))
+
+from pdf_backends import available_backends, iter_pages
+
+SAMPLE_PDF = os.path.join(ROOT, "sample_documents", "inputs", "test_paper.pdf")
+
+VOCABULARY = (
+    "watershed sediment nutrient model calibration discharge basin runoff erosion soil "
+    "analysis results method data study area flow load scenario uncertainty parameter "
+    "simulation observed monthly annual phosphorus nitrogen land use climate river"
+).split()
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(path, pages):
+    """Write a minimal PDF with one Helvetica page per entry of pages (a list of lines)"""
+    objects = {
+        1: "<< /Type /Catalog /Pages 2 0 R >>",
+        3: "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    kids = []
+    for i, lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * i, 5 + 2 * i
+        kids.append(f"{page_id} 0 R")
+        content = "BT /F1 10 Tf 12 TL 50 800 Td " + " ".join(f"({_escape(line)}) Tj T*" for line in lines) + " ET"
+        objects[page_id] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>")
+        objects[content_id] = f"<< /Length {len(content)} >>\nstream\n{content}\nendstream"
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(out)
+        out += f"{number} 0 obj\n{objects[number]}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for number in sorted(objects):
+        out += f"{offsets[number]:010d} 00000 n \n".encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    with open(path, 'wb') as f:
+        f.write(out)
+
+
+def make_corpus(directory, documents, pages, seed=0):
+    """Synthetic PDFs of random words; returns [(path, expected text)]"""
+    rng = random.Random(seed)
+    corpus = []
+    for d in range(documents):
+        page_lines = [[" ".join(rng.choice(VOCABULARY) for _ in range(10)) for _ in range(60)]
+                      for _ in range(pages)]
+        path = os.path.join(directory, f"synthetic_{d + 1}_{pages}p.pdf")
+        make_pdf(path, page_lines)
+        corpus.append((path, "\n".join("\n".join(lines) for lines in page_lines)))
+    return corpus
+
+
+def word_recall(expected, actual):
+    """Share of the words of expected found in actual (multiset), 0.0-1.0"""
+    expected_words = Counter(expected.split())
+    if not expected_words:
+        return 1.0
+    found = expected_words & Counter(actual.split())
+    return sum(found.values()) / sum(expected_words.values())
+
+
+def _measure(backend, path, repeat):
+    """Runs in a child process: best time over repeat reads, pages, peak RSS (MB) and the text"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        texts = [text for _, text in iter_pages(backend, path)]
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    peak = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        peak = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    return best, len(texts), peak, "\n".join(texts)
+
+
+def measure(backend, path, repeat):
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        return pool.submit(_measure, backend, path, repeat).result()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the installed PDF text extraction backends.")
+    parser.add_argument("files", nargs="*", help=f"PDF files to read (default: {os.path.relpath(SAMPLE_PDF, ROOT)})")
+    parser.add_argument("--backends", nargs="+", default=available_backends(),
+                        help="backends to compare (default: every installed one: %(default)s)")
+    parser.add_argument("--reference", help="backend whose text the real files are compared with (default: the last one)")
+    parser.add_argument("--documents", type=int, default=3, help="synthetic PDFs (default: %(default)s; 0 for none)")
+    parser.add_argument("--pages", type=int, default=100, help="pages per synthetic PDF (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="reads per file, best time kept (default: %(default)s)")
+    parser.add_argument("--json", help="also write the results to this file")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not args.backends:
+        print("No PDF backend installed (pip install pymupdf, pypdf, pdfminer.six or PyPDF2)", file=sys.stderr)
+        return 1
+    reference = args.reference or args.backends[-1]
+
+    with tempfile.TemporaryDirectory(prefix="stagiaria-bench-") as corpus_dir:
+        files = [(path, None) for path in (args.files or [SAMPLE_PDF])]
+        files += make_corpus(corpus_dir, args.documents, args.pages)
+
+        results = []
+        for path, expected in files:
+            reference_text = expected
+            if reference_text is None:
+                try:
+                    reference_text = measure(reference, path, 1)[3]
+                except Exception as e:
+                    # The other backends are still timed; their fidelity is unknown
+                    print(f"{reference} cannot read {os.path.basename(path)}: {e}", file=sys.stderr)
+            for backend in args.backends:
+                try:
+                    seconds, pages, peak, text = measure(backend, path, args.repeat)
+                except Exception as e:
+                    results.append({"backend": backend, "file": os.path.basename(path), "error": str(e)})
+                    continue
+                results.append({
+                    "backend": backend,
+                    "file": os.path.basename(path),
+                    "pages": pages,
+                    "seconds": round(seconds, 4),
+                    "pages_per_second": round(pages / seconds, 1) if seconds else None,
+                    "peak_rss_mb": round(peak, 1) if peak is not None else None,
+                    "fidelity": round(word_recall(reference_text, text), 4) if reference_text is not None else None,
+                    "fidelity_reference": "exact" if expected is not None else reference,
+                })
+
+    print(f"{'backend':<10} {'file':<28} {'pages':>6} {'pages/s':>9} {'peak MB':>8} {'fidelity':>9}")
+    for row in results:
+        if "error" in row:
+            print(f"{row['backend']:<10} {row['file'][:28]:<28} error: {row['error']}")
+            continue
+        rate = row["pages_per_second"] if row["pages_per_second"] is not None else "-"
+        peak = f"{row['peak_rss_mb']:.1f}" if row["peak_rss_mb"] is not None else "-"
+        fidelity = f"{row['fidelity']:.2%}" if row["fidelity"] is not None else "-"
+        print(f"{row['backend']:<10} {row['file'][:28]:<28} {row['pages']:>6} {rate:>9} "
+              f"{peak:>8} {fidelity:>9}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
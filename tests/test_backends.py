@@ -0,0 +1,160 @@
+"""BackendPool over local stand-in servers (stdlib only).
+
+Run from the repository root with: python -m unittest discover tests
+"""
+import os
+import sys
+import json
+import time
+import socket
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "code"))
+
+from ollama_client import OllamaClient, OllamaConnectionError
+from backends import BackendPool
+
+MESSAGES = [{"role": "user", "content": "texto"}]
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers /api/version and /api/chat; with server.cut, a stream stops after its first chunk"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, data):
+        raw = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _send_chunk(self, raw):
+        self.wfile.write(f"{len(raw):x}\r\n".encode("ascii") + raw + b"\r\n")
+
+    def do_GET(self):
+        self._send_json({"version": "0.0"})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with self.server.lock:
+            self.server.chats += 1
+        words = [self.server.name, "de", "teste"]
+        if not body.get("stream", True):
+            self._send_json({"message": {"role": "assistant", "content": " ".join(words)}, "done": True})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for word in words:
+            chunk = {"message": {"role": "assistant", "content": word + " "}, "done": False}
+            self._send_chunk(json.dumps(chunk).encode("utf-8") + b"\n")
+            if self.server.cut:
+                # Like a server that dies in the middle of a generation
+                self.wfile.flush()
+                self.close_connection = True
+                return
+        self._send_chunk(json.dumps({"message": {"role": "assistant", "content": ""}, "done": True}).encode("utf-8") + b"\n")
+        self._send_chunk(b"")
+
+
+def free_port():
+    """A local port nothing listens on"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class BackendPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.servers = []
+        self.clients = []
+
+    def tearDown(self):
+        for client in self.clients:
+            client.close()
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+    def start_server(self, name, port=0, cut=False):
+        server = ThreadingHTTPServer(("127.0.0.1", port), StandInHandler)
+        server.daemon_threads = True
+        server.lock = threading.Lock()
+        server.chats = 0
+        server.name = name
+        server.cut = cut
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.servers.append(server)
+        return server
+
+    def client(self, port):
+        client = OllamaClient(f"127.0.0.1:{port}", pool_size=2, timeout=10)
+        self.clients.append(client)
+        return client
+
+    def pool(self, ports, retry_seconds=30):
+        return BackendPool([self.client(port) for port in ports], retry_seconds=retry_seconds)
+
+    def text(self, chunks):
+        return "".join(chunk["message"]["content"] for chunk in chunks)
+
+    def test_request_goes_to_the_server_with_fewest_in_flight(self):
+        first = self.start_server("primeiro")
+        second = self.start_server("segundo")
+        pool = self.pool([first.server_address[1], second.server_address[1]])
+        stream = pool.chat_stream("m", MESSAGES)
+        # The stream holds its server until it is consumed
+        self.assertEqual(next(stream)["message"]["content"], "primeiro ")
+        self.assertEqual(pool.chat("m", MESSAGES)["message"]["content"], "segundo de teste")
+        self.assertEqual(pool.chat("m", MESSAGES)["message"]["content"], "segundo de teste")
+        stream.close()
+        # Both idle again: the one that served fewer requests
+        self.assertEqual(pool.chat("m", MESSAGES)["message"]["content"], "primeiro de teste")
+
+    def test_stream_fails_over_before_its_first_chunk(self):
+        alive = self.start_server("vivo")
+        pool = self.pool([free_port(), alive.server_address[1]])
+        self.assertEqual(self.text(pool.chat_stream("m", MESSAGES)), "vivo de teste ")
+        dead_stats, alive_stats = pool.stats()
+        self.assertEqual((dead_stats["failures"], dead_stats["healthy"]), (1, False))
+        self.assertEqual((alive_stats["requests"], alive_stats["healthy"]), (1, True))
+
+    def test_stream_is_not_replayed_after_chunks_arrived(self):
+        dying = self.start_server("cortado", cut=True)
+        other = self.start_server("outro")
+        pool = self.pool([dying.server_address[1], other.server_address[1]])
+        received = []
+        with self.assertRaises(OllamaConnectionError):
+            for chunk in pool.chat_stream("m", MESSAGES):
+                received.append(chunk)
+        self.assertEqual(self.text(received), "cortado ")
+        self.assertEqual(other.chats, 0)
+        self.assertFalse(pool.stats()[0]["healthy"])
+
+    def test_dead_server_rejoins_after_retry_seconds(self):
+        port = free_port()
+        alive = self.start_server("vivo")
+        pool = self.pool([port, alive.server_address[1]], retry_seconds=0.2)
+        self.assertEqual(pool.chat("m", MESSAGES)["message"]["content"], "vivo de teste")
+        self.assertFalse(pool.stats()[0]["healthy"])
+
+        revived = self.start_server("revivido", port=port)
+        # Not pinged again before its retry time
+        pool.chat("m", MESSAGES)
+        self.assertEqual(revived.chats, 0)
+        time.sleep(0.3)
+        self.assertEqual(pool.chat("m", MESSAGES)["message"]["content"], "revivido de teste")
+        self.assertTrue(pool.stats()[0]["healthy"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+"""AdaptiveLimiter driven by a simulated server on a simulated clock.
+
+Run from the repository root with: python -m unittest discover tests
+"""
+import os
+import sys
+import heapq
+import random
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "code"))
+
+from concurrency import AdaptiveLimiter
+
+
+class SimulatedServer:
+    """A server with a number of slots, each generating tokens_per_second; requests beyond them wait in line.
+
+    run() keeps the limiter's limit of requests in flight, like the Summarizer
+    does, and records the limit after each finished request.
+    """
+
+    def __init__(self, slots, tokens_per_second=50.0, seed=1):
+        self.slots = slots
+        self.tokens_per_second = tokens_per_second
+        self.random = random.Random(seed)
+        self.now = 0.0
+        self.limits = []
+
+    def clock(self):
+        return self.now
+
+    def run(self, limiter, requests, fail_at=()):
+        finishing = []
+        waiting = []
+        in_flight = 0
+        busy = 0
+        sent = 0
+        done = 0
+        while done < requests:
+            while in_flight < limiter.limit and sent < requests:
+                tokens = self.random.randint(200, 400)
+                waiting.append((self.now, tokens))
+                in_flight += 1
+                sent += 1
+            while waiting and busy < self.slots:
+                started, tokens = waiting.pop(0)
+                heapq.heappush(finishing, (self.now + tokens / self.tokens_per_second, started, tokens))
+                busy += 1
+            self.now, started, tokens = heapq.heappop(finishing)
+            busy -= 1
+            in_flight -= 1
+            if done in fail_at:
+                limiter.failed(started)
+            else:
+                limiter.succeeded(tokens, started=started)
+            done += 1
+            self.limits.append(limiter.limit)
+
+
+class AdaptiveLimiterTest(unittest.TestCase):
+
+    def limiter(self, server, initial, maximum):
+        return AdaptiveLimiter(initial, maximum=maximum, clock=server.clock)
+
+    def test_limit_stays_near_the_slots_when_more_does_not_help(self):
+        server = SimulatedServer(slots=4)
+        limiter = self.limiter(server, 4, 16)
+        server.run(limiter, 3000)
+        self.assertEqual(limiter.decreases, 0)
+        self.assertLessEqual(limiter.peak, 6)
+        # Only a probe now and then goes past 5
+        later = server.limits[500:]
+        self.assertGreater(sum(1 for limit in later if limit <= 5) / len(later), 0.9)
+        self.assertIn(limiter.limit, (3, 4, 5))
+
+    def test_limit_grows_while_the_server_scales(self):
+        server = SimulatedServer(slots=16)
+        limiter = self.limiter(server, 2, 8)
+        server.run(limiter, 3000)
+        self.assertEqual(limiter.peak, 8)
+        self.assertGreaterEqual(limiter.limit, 7)
+
+    def test_limit_finds_the_slots_from_below(self):
+        server = SimulatedServer(slots=6)
+        limiter = self.limiter(server, 2, 12)
+        server.run(limiter, 3000)
+        self.assertIn(limiter.limit, (5, 6, 7))
+
+    def test_burst_of_failures_halves_the_limit_once(self):
+        server = SimulatedServer(slots=8)
+        limiter = self.limiter(server, 8, 8)
+        # Everything in flight at the time fails together
+        server.run(limiter, 40, fail_at=range(20, 28))
+        self.assertEqual(limiter.decreases, 1)
+        self.assertEqual(server.limits[20], 4)
+
+    def test_latency_spike_halves_the_limit(self):
+        server = SimulatedServer(slots=4)
+        limiter = self.limiter(server, 4, 4)
+        for _ in range(5):
+            limiter.succeeded(100, latency=0.1, started=server.now)
+        server.now = 10.0
+        limiter.succeeded(100, latency=5.0, started=9.0)
+        self.assertEqual(limiter.limit, 2)
+        self.assertEqual(limiter.decreases, 1)
+        # Another slow request sent before the decrease is not a second overload
+        limiter.succeeded(100, latency=5.0, started=9.5)
+        self.assertEqual(limiter.limit, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
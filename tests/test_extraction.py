@@ -0,0 +1,53 @@
+"""Extraction process pool: a worker that dies takes down only its own file.
+
+Run from the repository root with: python -m unittest discover tests
+"""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import multiprocessing
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "code"))
+
+import extraction
+
+original_extract_file = extraction.extract_file
+
+
+def crashing_extract_file(file_path, *args):
+    """extract_file, except that the worker process dies on f2.txt"""
+    if os.path.basename(file_path) == "f2.txt":
+        os._exit(1)
+    return original_extract_file(file_path, *args)
+
+
+# Workers see the patched function only when they are forked from this process
+@unittest.skipUnless(multiprocessing.get_start_method() == "fork", "needs fork workers")
+class IterExtractedTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.paths = []
+        for number in range(8):
+            path = os.path.join(self.directory, f"f{number}.txt")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(f"Texto do arquivo {number}\n")
+            self.paths.append(path)
+        extraction.extract_file = crashing_extract_file
+
+    def tearDown(self):
+        extraction.extract_file = original_extract_file
+        shutil.rmtree(self.directory)
+
+    def test_only_the_crashing_file_fails(self):
+        results = list(extraction.iter_extracted(self.paths, workers=3))
+        self.assertEqual([result.file_path for result in results], self.paths)
+        failed = [os.path.basename(result.file_path) for result in results if result.error]
+        self.assertEqual(failed, ["f2.txt"])
+        self.assertIn("Texto do arquivo 7", results[7].document.text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+"""Duplicate detection of the image stage on rendered text pages.
+
+Run from the repository root with: python -m unittest discover tests
+"""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "code"))
+
+from images import pil_support, prepare_images
+
+if pil_support:
+    from PIL import Image, ImageDraw
+
+
+def render_page(path, lines):
+    """A white page with a few lines of black text, like a scanned page"""
+    page = Image.new('L', (850, 1100), 255)
+    draw = ImageDraw.Draw(page)
+    for number, line in enumerate(lines):
+        draw.text((80, 80 + 24 * number), line, fill=0)
+    page.save(path)
+
+
+@unittest.skipUnless(pil_support, "needs Pillow")
+class PrepareImagesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def page_paths(self, count, extension=".png"):
+        paths = []
+        for page in range(count):
+            path = os.path.join(self.directory, f"page{page}{extension}")
+            render_page(path, [f"Pagina {page}, linha {line}: texto diferente em cada pagina" for line in range(30)])
+            paths.append(path)
+        return paths
+
+    def test_distinct_text_pages_are_all_kept(self):
+        results = prepare_images(self.page_paths(4), max_side=2000)
+        self.assertEqual([result.duplicate_of for result in results], [None] * 4)
+        self.assertTrue(all(result.image is not None for result in results))
+
+    def test_same_page_in_another_format_is_a_duplicate(self):
+        png = self.page_paths(1)[0]
+        tiff = os.path.join(self.directory, "copy.tiff")
+        with Image.open(png) as page:
+            page.save(tiff)
+        results = prepare_images([png, tiff], max_side=2000)
+        self.assertIsNotNone(results[0].image)
+        self.assertIsNone(results[1].image)
+        self.assertEqual(results[1].duplicate_of, "page0.png")
+
+
+if __name__ == "__main__":
+    unittest.main()
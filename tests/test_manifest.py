@@ -0,0 +1,72 @@
+"""Manifest bookkeeping for inputs that share a ficha (a batch of images).
+
+Run from the repository root with: python -m unittest discover tests
+"""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "code"))
+
+from manifest import Manifest
+
+
+class BatchManifestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.input_dir = os.path.join(self.directory, "in")
+        self.output_dir = os.path.join(self.directory, "out")
+        os.makedirs(self.input_dir)
+        os.makedirs(os.path.join(self.output_dir, "fichas"))
+        self.images = [self.write_input(f"img{number}.png", f"pixels {number}") for number in range(3)]
+        # img0 and img1 went in one request, img2 in another
+        self.manifest = Manifest(self.output_dir)
+        self.record(self.images[:2], "img0.png+1_ficha.txt")
+        self.record(self.images[2:], "img2.png_ficha.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_input(self, name, content):
+        path = os.path.join(self.input_dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def record(self, paths, ficha):
+        ficha_path = os.path.join(self.output_dir, "fichas", ficha)
+        with open(ficha_path, 'w', encoding='utf-8') as f:
+            f.write("ficha")
+        for path in paths:
+            self.manifest.record(path, None, ficha_path, "m", "prompt")
+
+    def test_unchanged_batch_is_skipped(self):
+        to_process, unchanged = self.manifest.select_changed(self.images, "m", "prompt")
+        self.assertEqual(to_process, [])
+        self.assertEqual(unchanged, self.images)
+
+    def test_changing_one_image_redoes_its_whole_batch(self):
+        self.write_input("img1.png", "other pixels")
+        to_process, unchanged = self.manifest.select_changed(self.images, "m", "prompt")
+        self.assertEqual(to_process, self.images[:2])
+        self.assertEqual(unchanged, self.images[2:])
+
+    def test_deleting_one_image_forgets_its_batch(self):
+        os.remove(self.images[1])
+        removed = self.manifest.prune(self.input_dir, [self.images[0], self.images[2]])
+        self.assertEqual(removed, [os.path.abspath(self.images[1])])
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "fichas", "img0.png+1_ficha.txt")))
+        self.assertIsNone(self.manifest.ficha_of(self.images[0]))
+        self.assertEqual(self.manifest.ficha_of(self.images[2]), os.path.join("fichas", "img2.png_ficha.txt"))
+
+    def test_journal_survives_a_crash(self):
+        # No save(): a new Manifest only has the journal
+        reloaded = Manifest(self.output_dir)
+        self.assertEqual(reloaded.ficha_of(self.images[2]), os.path.join("fichas", "img2.png_ficha.txt"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+"""OllamaClient against a local stand-in server (stdlib only).
+
+Run from the repository root with: python -m unittest discover tests
+"""
+import os
+import sys
+import json
+import socket
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "code"))
+
+from ollama_client import OllamaClient, OllamaError, OllamaConnectionError
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers a few Ollama endpoints; the server object records the connections it saw"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def _send_json(self, data, status=200):
+        raw = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _send_chunk(self, raw):
+        self.wfile.write(f"{len(raw):x}\r\n".encode("ascii") + raw + b"\r\n")
+
+    def do_GET(self):
+        if self.path == "/api/version":
+            self._send_json({"version": "0.0"})
+        else:
+            self._send_json({"error": "not found"}, 404)
+        if self.server.drop_after_response:
+            # Like a server dropping an idle keep-alive connection, without announcing it
+            self.close_connection = True
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if body.get("model") == "missing":
+            self._send_json({"error": "model 'missing' not found"}, 404)
+            return
+        words = ["Ficha", "de", "teste"]
+        if not body.get("stream", True):
+            self._send_json({"message": {"role": "assistant", "content": " ".join(words)}, "done": True,
+                             "eval_count": len(words)})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for word in words:
+            chunk = {"message": {"role": "assistant", "content": word + " "}, "done": False}
+            self._send_chunk(json.dumps(chunk).encode("utf-8") + b"\n")
+        final = {"message": {"role": "assistant", "content": ""}, "done": True, "eval_count": len(words)}
+        self._send_chunk(json.dumps(final).encode("utf-8") + b"\n")
+        self._send_chunk(b"")
+
+
+class OllamaClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.connections = 0
+        self.server.drop_after_response = False
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.client = OllamaClient(f"127.0.0.1:{self.server.server_address[1]}", pool_size=2, timeout=10)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_requests_reuse_a_pooled_connection(self):
+        for _ in range(3):
+            self.assertEqual(self.client.request("GET", "/api/version"), {"version": "0.0"})
+        self.assertEqual(self.server.connections, 1)
+
+    def test_stale_connection_is_retried_on_a_fresh_one(self):
+        self.server.drop_after_response = True
+        self.client.request("GET", "/api/version")
+        # The pooled connection was closed by the server: the request goes out again on a new one
+        self.assertEqual(self.client.request("GET", "/api/version"), {"version": "0.0"})
+        self.assertEqual(self.server.connections, 2)
+
+    def test_chat_stream_yields_chunks_until_done(self):
+        chunks = list(self.client.chat_stream("m", [{"role": "user", "content": "texto"}]))
+        self.assertEqual("".join(chunk["message"]["content"] for chunk in chunks), "Ficha de teste ")
+        self.assertTrue(chunks[-1]["done"])
+        self.assertEqual(chunks[-1]["eval_count"], 3)
+        # The connection went back to the pool once the stream ended
+        self.client.chat("m", [{"role": "user", "content": "texto"}])
+        self.assertEqual(self.server.connections, 1)
+
+    def test_http_error_keeps_its_status(self):
+        with self.assertRaises(OllamaError) as raised:
+            self.client.chat("missing", [{"role": "user", "content": "texto"}])
+        self.assertNotIsInstance(raised.exception, OllamaConnectionError)
+        self.assertEqual(raised.exception.status, 404)
+        self.assertIn("not found", str(raised.exception))
+
+        with self.assertRaises(OllamaError) as raised:
+            list(self.client.chat_stream("missing", [{"role": "user", "content": "texto"}]))
+        self.assertNotIsInstance(raised.exception, OllamaConnectionError)
+        self.assertEqual(raised.exception.status, 404)
+
+    def test_unreachable_server_is_a_connection_error(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        client = OllamaClient(f"127.0.0.1:{port}", timeout=5)
+        with self.assertRaises(OllamaConnectionError):
+            client.request("GET", "/api/version")
+        self.assertFalse(client.ping())
+
+
+if __name__ == "__main__":
+    unittest.main()